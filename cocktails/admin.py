@@ -1,6 +1,6 @@
 from ast import If
 from django.contrib import admin
-from .models import BillingAddress, Cocktails, OrderItem, Order, Payment
+from .models import BillingAddress, Cocktails, OrderItem, Order, Payment, WebhookEvent
 
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['user','orderid','ordered','delivery_method','mollie_id','start_date']
@@ -22,8 +22,13 @@ class OrderItemAdmin(admin.ModelAdmin):
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ['user','order_id', 'mollie_payment_id','status','timestamp']
 
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['mollie_id','notifications','pending','received','processed']
+    list_filter = ['pending']
+
 admin.site.register(Cocktails)
 admin.site.register(OrderItem, OrderItemAdmin)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(Payment, PaymentAdmin)
-admin.site.register(BillingAddress)
\ No newline at end of file
+admin.site.register(BillingAddress)
+admin.site.register(WebhookEvent, WebhookEventAdmin)
\ No newline at end of file
@@ -0,0 +1,258 @@
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import Cocktails, Order, OrderItem
+from .money import cart_totals
+
+
+CART_COUNT_CACHE_KEY = 'cocktails:cart-count:{}'
+SESSION_CART_KEY = 'cart'
+
+
+def get_cart_count(user):
+    """Return the number of cocktails in the open order of the user.
+
+    The count is computed with a single SUM aggregate and cached per user until
+    the cart changes.
+    """
+    key = CART_COUNT_CACHE_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = OrderItem.objects.filter(user=user, ordered=False).aggregate(
+            count=Sum('quantity'))['count'] or 0
+        cache.set(key, count)
+    return count
+
+
+def invalidate_cart_count(user):
+    """Drop the cached cart count of the user once the current transaction commits."""
+    key = CART_COUNT_CACHE_KEY.format(user.pk)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _open_items(user, item):
+    return OrderItem.objects.filter(user=user, item=item, ordered=False)
+
+
+def _adjust_totals(user, item, quantity):
+    """Shift the cached totals of the open order by ``quantity`` units of ``item``."""
+    invalidate_cart_count(user)
+    amount = quantity * item.get_final_price()
+    updated = Order.objects.filter(user=user, ordered=False).update(
+        subtotal=F('subtotal') + amount,
+        discount=F('discount') + quantity * item.get_saving(),
+        total=F('total') + amount,
+    )
+    if not updated:
+        _attach_open_items(user)
+
+
+def _attach_open_items(user):
+    """Put the open order items of a user without an open order, e.g. after it was deleted, in a new one."""
+    order_items = list(OrderItem.objects.filter(user=user, ordered=False))
+    if not order_items:
+        return
+    order, created = Order.objects.get_or_create(
+        user=user,
+        ordered=False,
+        defaults={'start_date': timezone.now()}
+    )
+    order.items.add(*order_items)
+    order.refresh_totals()
+
+
+@transaction.atomic
+def add_item(user, item):
+    """Add one cocktail to the open order of the user and return the new quantity.
+
+    The hot path (cocktail already in the cart) is a single UPDATE with an F-expression
+    followed by a read of the new quantity and an UPDATE of the order totals. The open
+    order and the order item are only created the first time the cocktail is added.
+    """
+    order_items = _open_items(user, item)
+    if order_items.update(quantity=F('quantity') + 1):
+        _adjust_totals(user, item, 1)
+        return order_items.values_list('quantity', flat=True)[0]
+
+    order, created = Order.objects.get_or_create(
+        user=user,
+        ordered=False,
+        defaults={'start_date': timezone.now()}
+    )
+    try:
+        with transaction.atomic():
+            order_item = OrderItem.objects.create(user=user, item=item)
+    except IntegrityError:
+        # a concurrent request put the cocktail in the cart first
+        order_items.update(quantity=F('quantity') + 1)
+        _adjust_totals(user, item, 1)
+        return order_items.values_list('quantity', flat=True)[0]
+    order.items.add(order_item)
+    _adjust_totals(user, item, 1)
+    return order_item.quantity
+
+
+@transaction.atomic
+def remove_item(user, item):
+    """Remove one cocktail from the open order of the user.
+
+    Returns the new quantity, 0 when the last one was removed and None when the
+    cocktail was not in the cart.
+    """
+    order_items = _open_items(user, item)
+    if order_items.filter(quantity__gt=1).update(quantity=F('quantity') - 1):
+        _adjust_totals(user, item, -1)
+        return order_items.values_list('quantity', flat=True)[0]
+
+    deleted, _ = order_items.delete()
+    if deleted:
+        _adjust_totals(user, item, -1)
+        return 0
+    return None
+
+
+@transaction.atomic
+def clear_item(user, item):
+    """Remove a cocktail from the open order of the user, whatever its quantity.
+
+    Returns the removed quantity or None when the cocktail was not in the cart.
+    """
+    order_items = _open_items(user, item)
+    quantity = sum(order_items.select_for_update().values_list('quantity', flat=True))
+    if not quantity:
+        return None
+    order_items.delete()
+    _adjust_totals(user, item, -quantity)
+    return quantity
+
+
+@transaction.atomic
+def merge_cart(user, quantities):
+    """Add the cocktails of an anonymous cart to the open order of the user.
+
+    ``quantities`` maps cocktail ids to quantities. Cocktails already in the open order get
+    their quantity raised with one bulk UPDATE, the others are inserted with one bulk INSERT.
+    """
+    cocktails = Cocktails.objects.in_bulk([int(pk) for pk in quantities])
+    quantities = {int(pk): quantity for pk, quantity in quantities.items() if int(pk) in cocktails}
+    if not quantities:
+        return
+    order, created = Order.objects.get_or_create(
+        user=user,
+        ordered=False,
+        defaults={'start_date': timezone.now()}
+    )
+    order_items = list(OrderItem.objects.select_for_update().filter(
+        user=user, ordered=False, item__in=list(quantities)))
+    for order_item in order_items:
+        order_item.quantity += quantities.pop(order_item.item_id)
+    OrderItem.objects.bulk_update(order_items, ['quantity'])
+    order.items.add(*OrderItem.objects.bulk_create(
+        OrderItem(user=user, item_id=pk, quantity=quantity) for pk, quantity in quantities.items()))
+    order.refresh_totals()
+    invalidate_cart_count(user)
+
+
+class UserCart:
+    """The cart of a logged in user: the open order."""
+
+    def __init__(self, user):
+        self.user = user
+
+    def add_item(self, item):
+        return add_item(self.user, item)
+
+    def remove_item(self, item):
+        return remove_item(self.user, item)
+
+    def clear_item(self, item):
+        return clear_item(self.user, item)
+
+    def count(self):
+        return get_cart_count(self.user)
+
+    def exists(self):
+        return Order.objects.filter(user=self.user, ordered=False).exists()
+
+
+class SessionCart:
+    """The cart of an anonymous visitor, kept in the session until they log in.
+
+    The session maps cocktail ids to quantities, so browsing and filling the cart
+    doesn't write to the database; merge_session_cart moves it into an open order.
+    The methods return the same values as the functions of a logged in user's cart.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    @property
+    def quantities(self):
+        return self.session.get(SESSION_CART_KEY, {})
+
+    def _set_quantity(self, item, quantity):
+        quantities = self.quantities
+        if quantity:
+            quantities[str(item.pk)] = quantity
+        else:
+            quantities.pop(str(item.pk), None)
+        self.session[SESSION_CART_KEY] = quantities
+
+    def add_item(self, item):
+        quantity = self.quantities.get(str(item.pk), 0) + 1
+        self._set_quantity(item, quantity)
+        return quantity
+
+    def remove_item(self, item):
+        quantity = self.quantities.get(str(item.pk))
+        if quantity is None:
+            return None
+        self._set_quantity(item, quantity - 1)
+        return quantity - 1
+
+    def clear_item(self, item):
+        quantity = self.quantities.get(str(item.pk))
+        if quantity is not None:
+            self._set_quantity(item, 0)
+        return quantity
+
+    def count(self):
+        return sum(self.quantities.values())
+
+    def exists(self):
+        return bool(self.quantities)
+
+    def all(self):
+        """Return unsaved OrderItems for the cocktails in the cart, for display."""
+        cocktails = Cocktails.objects.in_bulk([int(pk) for pk in self.quantities])
+        return [OrderItem(item=cocktails[int(pk)], quantity=quantity)
+                for pk, quantity in self.quantities.items() if int(pk) in cocktails]
+
+    @property
+    def lines(self):
+        """Return the items like Order.objects.with_lines() does."""
+        order_items = self.all()
+        for order_item in order_items:
+            order_item.line_total = order_item.get_final_price()
+            order_item.line_saving = order_item.get_amount_saved()
+        return order_items
+
+    def get_total(self):
+        lines = [(order_item.quantity, order_item.item.price, order_item.item.discount_price)
+                 for order_item in self.all()]
+        return cart_totals(lines)['subtotal']
+
+
+def get_cart(request):
+    """Return the cart of the visitor: the open order of a user, or the session cart."""
+    if request.user.is_authenticated:
+        return UserCart(request.user)
+    return SessionCart(request.session)
+
+
+def merge_session_cart(sender, request, user, **kwargs):
+    """Move the session cart into the open order of a user who just logged in."""
+    quantities = request.session.pop(SESSION_CART_KEY, None) if request is not None else None
+    if quantities:
+        merge_cart(user, quantities)
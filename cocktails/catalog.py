@@ -0,0 +1,66 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from .models import CATEGORY_CHOICES, Cocktails
+
+CATALOG_PAGE_SIZE = 24
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+CATALOG_VERSION_KEY = 'cocktails:catalog-version'
+CATALOG_PAGE_KEY = 'cocktails:catalog:{version}:{category}:{after}'
+
+
+def get_catalog_version():
+    """Return the current catalog version, the timestamp of the last change to a cocktail."""
+    return cache.get_or_set(CATALOG_VERSION_KEY, time.time, None)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog page by moving to a new version."""
+    cache.set(CATALOG_VERSION_KEY, time.time(), None)
+
+
+def get_catalog_last_modified():
+    return datetime.fromtimestamp(int(get_catalog_version()), tz=timezone.utc)
+
+
+def clean_catalog_params(params):
+    """Return the (category, after) pair from the query string, ignoring invalid values."""
+    category = params.get('category', '')
+    if category not in dict(CATEGORY_CHOICES):
+        category = ''
+    try:
+        after = max(int(params.get('after', 0)), 0)
+    except ValueError:
+        after = 0
+    return category, after
+
+
+def get_catalog_page(category='', after=0):
+    """Return the rendered cards of one catalog page and the keyset of the next page.
+
+    Pages are keyed on the primary key of the last cocktail shown (keyset pagination),
+    so a page costs one indexed query however deep the visitor browses. The rendered
+    cards are cached per catalog version.
+    """
+    key = CATALOG_PAGE_KEY.format(version=get_catalog_version(), category=category, after=after)
+    page = cache.get(key)
+    if page is None:
+        cocktails = Cocktails.objects.filter(pk__gt=after).order_by('pk')
+        if category:
+            cocktails = cocktails.filter(category=category)
+        cocktails = list(cocktails[:CATALOG_PAGE_SIZE + 1])
+        next_after = cocktails[CATALOG_PAGE_SIZE - 1].pk if len(cocktails) > CATALOG_PAGE_SIZE else None
+        page = {
+            'cards': render_to_string('cocktails/cocktail_cards.html', {'cocktails': cocktails[:CATALOG_PAGE_SIZE]}),
+            'next_after': next_after,
+        }
+        cache.set(key, page, CATALOG_CACHE_TIMEOUT)
+    return page
+
+
+def get_catalog_etag(request, category, after, cart_item_count):
+    """Return the ETag of a catalog page as seen by the requesting user."""
+    parts = [get_catalog_version(), category, after, request.user.pk, cart_item_count]
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+from .cart import get_cart
+
+
+def cart(request):
+    """Expose the cart count of the current visitor as ``cart_item_count``.
+
+    The count is only computed when a template renders it, and at most once per request.
+    """
+    def count():
+        if not hasattr(request, '_cart_item_count'):
+            request._cart_item_count = get_cart(request).count()
+        return request._cart_item_count
+
+    return {'cart_item_count': SimpleLazyObject(count)}
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from cocktails.webhooks import process_pending_notifications
+
+
+class Command(BaseCommand):
+    help = 'Fetch and apply the payment status of every pending Mollie webhook notification.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=float, metavar='SECONDS',
+                            help='Keep running, looking for pending notifications every SECONDS.')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.monotonic()
+            processed = process_pending_notifications()
+            if processed:
+                elapsed = time.monotonic() - start
+                self.stdout.write('Processed %d notifications in %.2fs (%.1f/s)'
+                                  % (processed, elapsed, processed / elapsed))
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
+            # a long-running worker must not hold on to an expired or broken connection
+            close_old_connections()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from cocktails.catalog import bump_catalog_version
+from cocktails.models import Order, refresh_order_totals, sync_effective_prices
+
+
+class Command(BaseCommand):
+    help = ('Recompute the effective price and saving of every cocktail, and the totals of the open orders, '
+            'after prices were changed without saving the cocktails, e.g. with a bulk update.')
+
+    def handle(self, *args, **options):
+        cocktails = sync_effective_prices()
+        orders = refresh_order_totals(Order.objects.filter(ordered=False))
+        # the bulk updates send no signals, so the cached catalog pages still show the old prices
+        bump_catalog_version()
+        self.stdout.write('Updated the prices of %d cocktails and the totals of %d open orders' % (cocktails, orders))
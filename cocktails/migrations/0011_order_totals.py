@@ -0,0 +1,48 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:29
+
+from django.db import migrations, models
+from django.db.models import F, FloatField, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+def backfill_order_totals(apps, schema_editor):
+    Order = apps.get_model('cocktails', 'Order')
+    final_price = Coalesce(NullIf('item__discount_price', Value(0.0)), 'item__price')
+    for order in Order.objects.all():
+        totals = order.items.aggregate(
+            subtotal=Sum(F('quantity') * final_price, output_field=FloatField()),
+            discount=Sum(F('quantity') * (F('item__price') - final_price), output_field=FloatField()),
+        )
+        order.subtotal = totals['subtotal'] or 0.00
+        order.discount = totals['discount'] or 0.00
+        if order.delivery_method == 'D':
+            order.delivery = 5.00
+        if not order.ordered:
+            order.total = order.subtotal + order.delivery
+        order.save(update_fields=['subtotal', 'discount', 'delivery', 'total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0010_payment_order_id_alter_order_ordered_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivery',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='discount',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0011_order_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cocktails',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0012_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mollie_id', models.CharField(max_length=50, unique=True)),
+                ('received', models.DateTimeField()),
+                ('notifications', models.PositiveIntegerField(default=1)),
+                ('pending', models.BooleanField(db_index=True, default=True)),
+                ('processed', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
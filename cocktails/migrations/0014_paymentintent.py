@@ -0,0 +1,26 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0013_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=100, unique=True)),
+                ('amount', models.FloatField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('mollie_payment_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('checkout_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_intents', to='cocktails.order')),
+            ],
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:59
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+def merge_open_carts(apps, schema_editor):
+    """Fold duplicate open orders and order items into one, so the constraints can be added."""
+    Order = apps.get_model('cocktails', 'Order')
+    OrderItem = apps.get_model('cocktails', 'OrderItem')
+    changed = set()
+    users = Order.objects.filter(ordered=False).values('user').annotate(n=Count('id')).filter(n__gt=1)
+    for user_id in users.values_list('user', flat=True):
+        kept, *duplicates = Order.objects.filter(user_id=user_id, ordered=False).order_by('pk')
+        for duplicate in duplicates:
+            kept.items.add(*duplicate.items.all())
+            duplicate.delete()
+        changed.add(kept.pk)
+    items = (OrderItem.objects.filter(ordered=False, user__isnull=False)
+             .values('user', 'item').annotate(n=Count('id')).filter(n__gt=1))
+    for key in items.values('user', 'item'):
+        order = Order.objects.filter(user_id=key['user'], ordered=False).first()
+        # keep the item in the cart, not an orphan that no open order holds
+        order_items = OrderItem.objects.filter(ordered=False, **key).order_by('pk')
+        if order is not None:
+            order_items = order_items.annotate(
+                in_cart=Count('order', filter=Q(order=order))).order_by('-in_cart', 'pk')
+        kept, *duplicates = order_items
+        OrderItem.objects.filter(pk=kept.pk).update(
+            quantity=F('quantity') + sum(duplicate.quantity for duplicate in duplicates))
+        OrderItem.objects.filter(pk__in=[duplicate.pk for duplicate in duplicates]).delete()
+        if order is not None:
+            order.items.add(kept)
+            changed.add(order.pk)
+    recompute_order_totals(Order.objects.filter(pk__in=changed))
+
+
+def recompute_order_totals(orders):
+    final_price = Coalesce(NullIf('item__discount_price', Value(0.0)), 'item__price')
+    for order in orders:
+        totals = order.items.aggregate(
+            subtotal=Sum(F('quantity') * final_price, output_field=FloatField()),
+            discount=Sum(F('quantity') * (F('item__price') - final_price), output_field=FloatField()),
+        )
+        order.subtotal = totals['subtotal'] or 0.00
+        order.discount = totals['discount'] or 0.00
+        order.total = order.subtotal + order.delivery
+        order.save(update_fields=['subtotal', 'discount', 'total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0014_paymentintent'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_open_carts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(condition=models.Q(('ordered', False)), fields=('user',), name='cocktails_order_open_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('ordered', False)), fields=('user', 'item'), name='cocktails_orderitem_open_unique'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.0.10 on 2026-10-18 13:03
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+def recompute_open_order_totals(apps, schema_editor):
+    """Recompute the totals of open orders exactly from their items, all in one UPDATE.
+
+    The totals of placed orders are what was charged, and are only rounded to the cent.
+    """
+    Order = apps.get_model('cocktails', 'Order')
+    OrderItem = apps.get_model('cocktails', 'OrderItem')
+    money = models.DecimalField(max_digits=10, decimal_places=2)
+    zero = Value(Decimal('0.00'))
+    final_price = Coalesce(NullIf('item__discount_price', zero), 'item__price', output_field=money)
+    lines = OrderItem.objects.filter(order=OuterRef('pk')).values('order')
+    subtotal = Sum(F('quantity') * final_price, output_field=money)
+    discount = Sum(F('quantity') * (F('item__price') - final_price), output_field=money)
+    subtotal, discount = (
+        Coalesce(Subquery(lines.annotate(amount=total).values('amount')), zero, output_field=money)
+        for total in (subtotal, discount)
+    )
+    Order.objects.filter(ordered=False).update(subtotal=subtotal, discount=discount, total=subtotal + F('delivery'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0015_open_cart_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cocktails',
+            name='discount_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='cocktails',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('10.00'), max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='delivery',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='paymentintent',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+        migrations.RunPython(recompute_open_order_totals, migrations.RunPython.noop),
+    ]
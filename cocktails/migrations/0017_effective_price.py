@@ -0,0 +1,34 @@
+# Generated by Django 4.0.10 on 2026-10-18 13:05
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+def sync_effective_prices(apps, schema_editor):
+    Cocktails = apps.get_model('cocktails', 'Cocktails')
+    money = models.DecimalField(max_digits=10, decimal_places=2)
+    effective_price = Coalesce(NullIf('discount_price', Value(Decimal('0.00'))), 'price', output_field=money)
+    Cocktails.objects.update(effective_price=effective_price, saving=F('price') - effective_price)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0016_money_decimal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cocktails',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('10.00'), editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='cocktails',
+            name='saving',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.RunPython(sync_effective_prices, migrations.RunPython.noop),
+    ]
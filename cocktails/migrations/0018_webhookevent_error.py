@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0017_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.10 on 2026-10-18 13:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0018_webhookevent_error'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='ordered_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.0.10 on 2026-10-18 15:40
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def clamp_effective_prices(apps, schema_editor):
+    """Charge the price of cocktails whose discount price is above it, and refresh the open orders with them."""
+    Cocktails = apps.get_model('cocktails', 'Cocktails')
+    Order = apps.get_model('cocktails', 'Order')
+    OrderItem = apps.get_model('cocktails', 'OrderItem')
+    zero = Value(Decimal('0.00'))
+    cocktails = Cocktails.objects.filter(discount_price__gt=F('price'))
+    affected = list(cocktails.values_list('pk', flat=True))
+    if not affected:
+        return
+    cocktails.update(effective_price=F('price'), saving=zero)
+
+    money = models.DecimalField(max_digits=10, decimal_places=2)
+    lines = OrderItem.objects.filter(order=OuterRef('pk')).values('order')
+    subtotal = Sum(F('quantity') * F('item__effective_price'), output_field=money)
+    discount = Sum(F('quantity') * F('item__saving'), output_field=money)
+    subtotal, discount = (
+        Coalesce(Subquery(lines.annotate(amount=total).values('amount')), zero, output_field=money)
+        for total in (subtotal, discount)
+    )
+    Order.objects.filter(ordered=False, items__item__in=affected).update(
+        subtotal=subtotal, discount=discount, total=subtotal + F('delivery'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cocktails', '0019_order_ordered_date_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_effective_prices, migrations.RunPython.noop),
+    ]
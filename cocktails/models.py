@@ -1,7 +1,11 @@
-from datetime import datetime
 from unittest.util import _MAX_LENGTH
 from django.db import models
+from decimal import Decimal
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least, NullIf
 from django.conf import settings
+from django.utils import timezone
+from .money import ZERO, MoneyField, to_money
 import uuid
 
 CATEGORY_CHOICES=(
@@ -9,23 +13,66 @@ CATEGORY_CHOICES=(
     ('C', 'Cocktails'),
 )
 
+DELIVERY_COST = Decimal('5.00')
+
 class Cocktails(models.Model):
     title = models.CharField(max_length=255)
     image = models.ImageField(upload_to='cocktails/')
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     body = models.TextField()
     category = models.CharField(default="C",choices=CATEGORY_CHOICES, max_length=1)
     pubdate = models.DateTimeField(auto_now_add=True)
     garnish = models.TextField(blank=True)
     taste = models.TextField(blank=True)
-    price = models.FloatField(default=10.00)
-    discount_price = models.FloatField(blank=True, null=True)
+    price = MoneyField(default=Decimal('10.00'))
+    discount_price = MoneyField(blank=True, null=True)
+    # the price paid and the saving on the price, kept in sync with them on save
+    effective_price = MoneyField(default=Decimal('10.00'), editable=False)
+    saving = MoneyField(default=ZERO, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # a discount price above the price is no discount
+        self.effective_price = min(to_money(self.price), to_money(self.discount_price or self.price))
+        self.saving = to_money(self.price) - self.effective_price
+        update_fields = kwargs.get('update_fields')
+        # a save of other fields mustn't write prices computed from a possibly stale instance
+        if update_fields is not None and {'price', 'discount_price'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'effective_price', 'saving'}
+        super().save(*args, **kwargs)
+
     def summary(self):
         return self.body[:200]
 
+    def get_final_price(self):
+        return self.effective_price
+
+    def get_saving(self):
+        return self.saving
+
+
+def sync_effective_prices(cocktails=None):
+    """Recompute the effective price and saving of cocktails in one UPDATE, e.g. after a bulk price update.
+
+    Like any bulk update this sends no signals: bump the catalog version afterwards.
+    """
+    cocktails = Cocktails.objects.all() if cocktails is None else cocktails
+    effective_price = Least(
+        'price', Coalesce(NullIf('discount_price', Value(ZERO)), 'price'), output_field=MoneyField())
+    return cocktails.update(effective_price=effective_price, saving=F('price') - effective_price)
+
+
+class OrderItemQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate the items with the amount paid, ``line_total``, and saved, ``line_saving``."""
+        return self.annotate(
+            line_total=ExpressionWrapper(F('quantity') * F('item__effective_price'), output_field=MoneyField()),
+            line_saving=ExpressionWrapper(F('quantity') * F('item__saving'), output_field=MoneyField()),
+        )
+
+
 class OrderItem(models.Model):
     user=models.ForeignKey(settings.AUTH_USER_MODEL, 
                             on_delete=models.CASCADE, blank=True, null = True)
@@ -34,6 +81,15 @@ class OrderItem(models.Model):
     quantity=models.IntegerField(default=1)
     ordered_timestamp = models.DateTimeField(blank=True,null = True)
 
+    objects = OrderItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # a cocktail is in the cart once, with a quantity; also the index of the cart lookups
+            models.UniqueConstraint(fields=['user', 'item'], condition=models.Q(ordered=False),
+                                    name='cocktails_orderitem_open_unique'),
+        ]
+
     def __str__(self):
             template='{0.quantity} x {0.item}'
             return template.format(self)
@@ -45,42 +101,93 @@ class OrderItem(models.Model):
         return self.quantity * self.item.discount_price
     
     def get_amount_saved(self):
-        return self.get_total_item_price() - self.get_total_discount_price()
+        return self.quantity * self.item.saving
     
     def get_final_price(self):
-        if self.item.discount_price:
-            return self.get_total_discount_price()
-        return self.get_total_item_price()
+        return self.quantity * self.item.effective_price
+
+class OrderQuerySet(models.QuerySet):
+    def with_lines(self):
+        """Load the items of the orders with their cocktails and totals as ``lines``, in one more query."""
+        lines = OrderItem.objects.with_totals().select_related('item').order_by('pk')
+        return self.prefetch_related(models.Prefetch('items', queryset=lines, to_attr='lines'))
+
 
 class Order(models.Model):
     orderid = models.UUIDField(default=uuid.uuid4, unique=True, db_index=True, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, 
                             on_delete=models.CASCADE)
     start_date=models.DateTimeField()
-    ordered_date = models.DateTimeField(default=datetime.now())
+    ordered_date = models.DateTimeField(default=timezone.now)
     ordered=models.BooleanField(default=False)
     items = models.ManyToManyField(OrderItem)
     delivery_method = models.CharField(max_length=1, null=True,blank=True)
     billing_address=models.ForeignKey('BillingAddress',on_delete=models.SET_NULL, blank=True, null=True)
     mollie_id=models.CharField(max_length= 25,blank=True, null=True)
-    total = models.FloatField(default=0.00)
+    subtotal = MoneyField(default=ZERO)
+    discount = MoneyField(default=ZERO)
+    delivery = MoneyField(default=ZERO)
+    total = MoneyField(default=ZERO)
     paid=models.BooleanField(default=False)
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # one open order (the cart) per user; also the index of the cart lookups
+            models.UniqueConstraint(fields=['user'], condition=models.Q(ordered=False),
+                                    name='cocktails_order_open_unique'),
+        ]
+
     def __str__(self):
         template='ID: {0.orderid} - Ordered by: {0.user.username} - Totaal: €{0.total}'
         return template.format(self)
 
     def get_total(self):
-        total=0.00
-        for order_item in self.items.all():
-            total += order_item.get_final_price()
-        return total
+        return self.subtotal
     
     def get_total_delivery(self):
-        total=5.00
-        for order_item in self.items.all():
-            total += order_item.get_final_price()
-        return total
+        return self.subtotal + DELIVERY_COST
+
+    def aggregate_totals(self):
+        """Compute subtotal and discount from the order items in a single query."""
+        totals = self.items.aggregate(**line_totals())
+        # rounded, as SQLite computes with floats
+        return {key: to_money(value) for key, value in totals.items()}
+
+    def refresh_totals(self):
+        """Recompute the cached totals, e.g. after a price change of a cocktail in the cart."""
+        totals = self.aggregate_totals()
+        self.subtotal = totals['subtotal']
+        self.discount = totals['discount']
+        self.total = self.subtotal + self.delivery
+        self.save(update_fields=['subtotal', 'discount', 'total'])
+
+    def mark_ordered(self, mollie_id, timestamp):
+        """Mark the order and all of its items ordered, with one UPDATE per table."""
+        self.items.update(ordered=True, ordered_timestamp=timestamp)
+        Order.objects.filter(pk=self.pk).update(mollie_id=mollie_id, ordered=True, ordered_date=timestamp)
+        self.mollie_id = mollie_id
+        self.ordered = True
+        self.ordered_date = timestamp
+
+
+def line_totals():
+    """Return the SUM expressions of the subtotal and the discount of order items."""
+    return {
+        'subtotal': Sum(F('quantity') * F('item__effective_price'), output_field=MoneyField()),
+        'discount': Sum(F('quantity') * F('item__saving'), output_field=MoneyField()),
+    }
+
+
+def refresh_order_totals(orders):
+    """Recompute the cached totals of all given orders in a single UPDATE, e.g. after a price change."""
+    lines = OrderItem.objects.filter(order=OuterRef('pk')).values('order')
+    totals = {
+        name: Coalesce(Subquery(lines.annotate(amount=total).values('amount')), Value(ZERO), output_field=MoneyField())
+        for name, total in line_totals().items()
+    }
+    return orders.update(total=totals['subtotal'] + F('delivery'), **totals)
 
 class BillingAddress(models.Model):
     user=models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -102,11 +209,41 @@ class Payment(models.Model):
     mollie_payment_id = models.CharField(max_length=50)
     order_id=models.CharField(max_length=250, blank=True, null=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
-    amount = models.FloatField()
+    amount = MoneyField()
     timestamp = models.DateTimeField()
     link = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=50, default="NotPaid")
     address=models.TextField(blank=True)
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return self.user.username
+
+class WebhookEvent(models.Model):
+    """A Mollie webhook notification, kept until the payment status it announces has been fetched."""
+    mollie_id = models.CharField(max_length=50, unique=True)
+    received = models.DateTimeField()
+    notifications = models.PositiveIntegerField(default=1)
+    pending = models.BooleanField(default=True, db_index=True)
+    processed = models.DateTimeField(blank=True, null=True)
+    error = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return self.mollie_id
+
+
+class PaymentIntent(models.Model):
+    """Outbox record of a Mollie payment for an order, written before the payment is created.
+
+    The idempotency key is sent along with the create call, so retrying a payment that may or
+    may not have been created returns the same Mollie payment, and once the checkout URL is
+    stored a retry doesn't call the API at all.
+    """
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='payment_intents')
+    amount = MoneyField()
+    created = models.DateTimeField(auto_now_add=True)
+    mollie_payment_id = models.CharField(max_length=50, blank=True, null=True)
+    checkout_url = models.URLField(max_length=500, blank=True, null=True)
+
+    def __str__(self):
+        return self.idempotency_key
@@ -0,0 +1,163 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .client import generate_querystring
+
+
+def request_digest(api_key, path, params):
+    """Return a digest identifying a GET request, for use in cache keys."""
+    url = f"{path}?{generate_querystring(params) or ''}"
+    return hashlib.sha1(f"{api_key}\n{url}".encode()).hexdigest()
+
+
+class MemoryCache(object):
+    """An in-process cache backend, holding at most `maxsize` entries and evicting the least recently used."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, expires = self._entries[key]
+            except KeyError:
+                return None
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            expires = float("inf") if timeout is None else time.monotonic() + timeout
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache(object):
+    """Cache for the GET requests of resources whose data rarely changes, like methods and profiles.
+
+    Caching is enabled per resource, by its name on the client, with a time to live in seconds:
+
+        client = Client(response_cache=ResponseCache(ttls={"methods": 3600, "profiles": 600}))
+
+    Responses are cached per API key and request URL. Any other request to a cached resource, like enabling
+    a profile method, invalidates all cached responses. The backend is a MemoryCache by default, but can be
+    any object with `get(key)` and `set(key, value, timeout)` methods, such as a Django cache.
+    """
+
+    DEFAULT_TTLS = {
+        "methods": 3600,
+        "profile_methods": 3600,
+        "profiles": 3600,
+    }
+    GENERATION_KEY = "mollie:response-cache:generation"
+
+    def __init__(self, ttls=None, backend=None, maxsize=256):
+        self.ttls = self.DEFAULT_TTLS if ttls is None else ttls
+        self.backend = MemoryCache(maxsize) if backend is None else backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_resource_key(resource):
+        """Return the name of a resource on the client, e.g. `profile_methods` for ProfileMethods."""
+        return re.sub(r"(?<!^)(?=[A-Z])", "_", resource.__class__.__name__).lower()
+
+    def get_ttl(self, resource):
+        return self.ttls.get(self.get_resource_key(resource))
+
+    def make_key(self, api_key, path, params):
+        generation = self.backend.get(self.GENERATION_KEY) or 0
+        return f"mollie:response-cache:{generation}:{request_digest(api_key, path, params)}"
+
+    def get(self, key):
+        result = self.backend.get(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def set(self, key, result, ttl):
+        self.backend.set(key, result, ttl)
+        return result
+
+    def invalidate(self, result=None):
+        """Drop all cached responses, by moving on to a new generation of keys.
+
+        Returns the given result, so this can handle the response of a request that changed a cached resource.
+        """
+        generation = self.backend.get(self.GENERATION_KEY) or 0
+        self.backend.set(self.GENERATION_KEY, generation + 1, None)
+        return result
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+
+class ConditionalCache(object):
+    """Store of the ETag and Last-Modified validators of GET responses, along with the decoded results.
+
+    A repeated GET request for the same URL is sent as a conditional request. When the API answers with
+    304 Not Modified, the stored result is used, so the response body is neither downloaded nor decoded:
+
+        client = Client(conditional_cache=ConditionalCache())
+
+    At most `maxsize` results are kept, evicting the least recently used.
+    """
+
+    def __init__(self, maxsize=1024):
+        self._store = MemoryCache(maxsize)
+        self.not_modified = 0
+        self.modified = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, key, handle_response):
+        """Return the conditional headers for a request, and a response handler that uses or updates the store."""
+        entry = self._store.get(key)
+        headers = {}
+        if entry is not None:
+            etag, last_modified, _ = entry
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        def handle_conditional_response(resp):
+            if resp.status_code == 304 and entry is not None:
+                self._count("not_modified")
+                return entry[2]
+            result = handle_response(resp)
+            etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._store.set(key, (etag, last_modified, result), None)
+            self._count("modified")
+            return result
+
+        return headers, handle_conditional_response
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self._lock:
+            return {"not_modified": self.not_modified, "modified": self.modified}
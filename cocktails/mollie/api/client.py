@@ -1,45 +1,18 @@
-import json
+import importlib
 import platform
 import re
 import ssl
+import time
 from collections import OrderedDict
 from urllib.parse import urlencode
 
 import requests
 from requests_oauthlib import OAuth2Session
-from urllib3.util import Retry
+from urllib3.exceptions import NewConnectionError
 
 from .error import RequestError, RequestSetupError
-from .resources.captures import Captures
-from .resources.chargebacks import Chargebacks
-from .resources.customer_mandates import CustomerMandates
-from .resources.customer_payments import CustomerPayments
-from .resources.customer_subscriptions import CustomerSubscriptions
-from .resources.customers import Customers
-from .resources.invoices import Invoices
-from .resources.methods import Methods
-from .resources.onboarding import Onboarding
-from .resources.orders import Orders
-from .resources.organizations import Organizations
-from .resources.payment_chargebacks import PaymentChargebacks
-from .resources.payment_links import PaymentLinks
-from .resources.payment_refunds import PaymentRefunds
-from .resources.payments import Payments
-from .resources.permissions import Permissions
-from .resources.profile_chargebacks import ProfileChargebacks
-from .resources.profile_methods import ProfileMethods
-from .resources.profile_payments import ProfilePayments
-from .resources.profile_refunds import ProfileRefunds
-from .resources.profiles import Profiles
-from .resources.refunds import Refunds
-from .resources.settlement_captures import SettlementCaptures
-from .resources.settlement_chargebacks import SettlementChargebacks
-from .resources.settlement_payments import SettlementPayments
-from .resources.settlement_refunds import SettlementRefunds
-from .resources.settlements import Settlements
-from .resources.shipments import Shipments
-from .resources.subscription_payments import SubscriptionPayments
-from .resources.subscriptions import Subscriptions
+from .retry import CONNECT_ERROR, READ_ERROR, RetryPolicy
+from .serializers import get_default_serializer
 from .version import VERSION
 
 
@@ -53,6 +26,41 @@ class Client(object):
     OAUTH_AUTO_REFRESH_URL = API_ENDPOINT + "/oauth2/tokens"
     OAUTH_TOKEN_URL = API_ENDPOINT + "/oauth2/tokens"
 
+    # Endpoint resources, by attribute name: (module in mollie.api.resources, class name).
+    # They are only imported and created when they are accessed for the first time.
+    RESOURCES = {
+        "payments": ("payments", "Payments"),
+        "payment_links": ("payment_links", "PaymentLinks"),
+        "payment_refunds": ("payment_refunds", "PaymentRefunds"),
+        "payment_chargebacks": ("payment_chargebacks", "PaymentChargebacks"),
+        "profiles": ("profiles", "Profiles"),
+        "profile_chargebacks": ("profile_chargebacks", "ProfileChargebacks"),
+        "profile_methods": ("profile_methods", "ProfileMethods"),
+        "profile_payments": ("profile_payments", "ProfilePayments"),
+        "profile_refunds": ("profile_refunds", "ProfileRefunds"),
+        "methods": ("methods", "Methods"),
+        "refunds": ("refunds", "Refunds"),
+        "chargebacks": ("chargebacks", "Chargebacks"),
+        "customers": ("customers", "Customers"),
+        "customer_mandates": ("customer_mandates", "CustomerMandates"),
+        "customer_subscriptions": ("customer_subscriptions", "CustomerSubscriptions"),
+        "customer_payments": ("customer_payments", "CustomerPayments"),
+        "orders": ("orders", "Orders"),
+        "organizations": ("organizations", "Organizations"),
+        "subscription_payments": ("subscription_payments", "SubscriptionPayments"),
+        "invoices": ("invoices", "Invoices"),
+        "permissions": ("permissions", "Permissions"),
+        "onboarding": ("onboarding", "Onboarding"),
+        "captures": ("captures", "Captures"),
+        "settlements": ("settlements", "Settlements"),
+        "settlement_payments": ("settlement_payments", "SettlementPayments"),
+        "settlement_refunds": ("settlement_refunds", "SettlementRefunds"),
+        "settlement_chargebacks": ("settlement_chargebacks", "SettlementChargebacks"),
+        "settlement_captures": ("settlement_captures", "SettlementCaptures"),
+        "shipments": ("shipments", "Shipments"),
+        "subscriptions": ("subscriptions", "Subscriptions"),
+    }
+
     @staticmethod
     def validate_api_endpoint(api_endpoint):
         return api_endpoint.strip().rstrip("/")
@@ -73,19 +81,45 @@ class Client(object):
             )
         return access_token
 
-    def __init__(self, api_endpoint=None, timeout=(2, 10), retry=3):
+    def __init__(
+        self,
+        api_endpoint=None,
+        timeout=(2, 10),
+        retry=3,
+        pool_maxsize=None,
+        response_cache=None,
+        conditional_cache=None,
+        circuit_breaker=None,
+        serializer=None,
+    ):
         """Initialize a new Mollie API client.
 
         :param api_endpoint: The API endpoint to communicate to, this default to the production environment (string)
         :param timeout: The timeouts used for the HTTP requests to the API, the default specifies both connect and
             read timeout (integer or tuple)
-        :param retry: The number of retries that the client should perform in case of failed requests. Note that only
-            connect errors trigger a retry, errors reponses from the API don't (integer).
+        :param retry: The number of retries that the client should perform in case of failed requests, or a
+            RetryPolicy to configure which requests are retried and when (integer or RetryPolicy).
+        :param pool_maxsize: The maximum number of connections to the API that are kept open for reuse. Raise this
+            when the client is shared between threads, the default is the pool size of requests (integer).
+        :param response_cache: Cache for the responses of rarely changing resources, see `ResponseCache`
+            (ResponseCache)
+        :param conditional_cache: Store for the ETags of GET responses, to turn repeated GET requests into
+            conditional requests, see `ConditionalCache` (ConditionalCache)
+        :param circuit_breaker: Stops sending requests for a while when the API keeps failing, see
+            `CircuitBreaker` (CircuitBreaker)
+        :param serializer: Encodes request data and decodes responses, the default uses orjson or ujson when
+            installed, see `mollie.api.serializers` (JSONSerializer)
         """
         self.api_endpoint = self.validate_api_endpoint(api_endpoint or self.API_ENDPOINT)
         self.api_version = self.API_VERSION
         self.timeout = timeout
         self.retry = retry
+        self.retry_policy = retry if isinstance(retry, RetryPolicy) else RetryPolicy(retries=retry or 0)
+        self.circuit_breaker = circuit_breaker
+        self.serializer = serializer or get_default_serializer()
+        self.pool_maxsize = pool_maxsize
+        self.response_cache = response_cache
+        self.conditional_cache = conditional_cache
         self.api_key = None
         self._client = None
 
@@ -94,38 +128,6 @@ class Client(object):
         self.access_token = None
         self.set_token = None
 
-        # add endpoint resources
-        self.payments = Payments(self)
-        self.payment_links = PaymentLinks(self)
-        self.payment_refunds = PaymentRefunds(self)
-        self.payment_chargebacks = PaymentChargebacks(self)
-        self.profiles = Profiles(self)
-        self.profile_chargebacks = ProfileChargebacks(self)
-        self.profile_methods = ProfileMethods(self)
-        self.profile_payments = ProfilePayments(self)
-        self.profile_refunds = ProfileRefunds(self)
-        self.methods = Methods(self)
-        self.refunds = Refunds(self)
-        self.chargebacks = Chargebacks(self)
-        self.customers = Customers(self)
-        self.customer_mandates = CustomerMandates(self)
-        self.customer_subscriptions = CustomerSubscriptions(self)
-        self.customer_payments = CustomerPayments(self)
-        self.orders = Orders(self)
-        self.organizations = Organizations(self)
-        self.subscription_payments = SubscriptionPayments(self)
-        self.invoices = Invoices(self)
-        self.permissions = Permissions(self)
-        self.onboarding = Onboarding(self)
-        self.captures = Captures(self)
-        self.settlements = Settlements(self)
-        self.settlement_payments = SettlementPayments(self)
-        self.settlement_refunds = SettlementRefunds(self)
-        self.settlement_chargebacks = SettlementChargebacks(self)
-        self.settlement_captures = SettlementCaptures(self)
-        self.shipments = Shipments(self)
-        self.subscriptions = Subscriptions(self)
-
         # compose base user agent string
         self.user_agent_components = OrderedDict()
         self.set_user_agent_component("Mollie", self.CLIENT_VERSION)
@@ -134,6 +136,17 @@ class Client(object):
             "OpenSSL", ssl.OPENSSL_VERSION.split(" ")[1], sanitize=False
         )  # keep legacy formatting of this component
 
+    def __getattr__(self, name):
+        """Create an endpoint resource on first access, and keep it for later use."""
+        try:
+            module_name, class_name = self.RESOURCES[name]
+        except KeyError:
+            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+        module = importlib.import_module(f"{__package__}.resources.{module_name}")
+        resource = getattr(module, class_name)(self)
+        setattr(self, name, resource)
+        return resource
+
     def set_api_endpoint(self, api_endpoint):
         self.api_endpoint = self.validate_api_endpoint(api_endpoint)
 
@@ -147,6 +160,12 @@ class Client(object):
     def set_timeout(self, timeout):
         self.timeout = timeout
 
+    def set_response_cache(self, response_cache):
+        self.response_cache = response_cache
+
+    def set_conditional_cache(self, conditional_cache):
+        self.conditional_cache = conditional_cache
+
     def set_user_agent_component(self, key, value, sanitize=True):
         """Add or replace new user-agent component strings.
 
@@ -178,7 +197,7 @@ class Client(object):
 
         if data is not None:
             try:
-                data = json.dumps(data)
+                data = self.serializer.dumps(data)
             except Exception as err:
                 raise RequestSetupError(f"Error encoding parameters into JSON: '{err}'.")
 
@@ -189,7 +208,19 @@ class Client(object):
 
         return url, data, params
 
-    def _perform_http_call_apikey(self, http_method, path, data=None, params=None):
+    def _get_headers(self, idempotency_key=None, headers=None):
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "User-Agent": self.user_agent,
+            "X-Mollie-Client-Info": self.UNAME,
+            **(headers or {}),
+        }
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        return headers
+
+    def _perform_http_call_apikey(self, http_method, path, data=None, params=None, idempotency_key=None, headers=None):
         if not self.api_key:
             raise RequestSetupError("You have not set an API key. Please use set_api_key() to set the API key.")
 
@@ -199,50 +230,99 @@ class Client(object):
             self._setup_retry()
 
         url, data, params = self._format_request_data(path, data, params)
-        try:
-            response = self._client.request(
-                method=http_method,
-                url=url,
-                headers={
-                    "Accept": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                    "User-Agent": self.user_agent,
-                    "X-Mollie-Client-Info": self.UNAME,
-                },
-                params=params,
-                data=data,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.RequestException as err:
-            raise RequestError(f"Unable to communicate with Mollie: {err}")
-        return response
+        headers = self._get_headers(idempotency_key, headers)
+        headers["Authorization"] = f"Bearer {self.api_key}"
+        return self._send(self._client, http_method, url, headers, params, data)
 
-    def _perform_http_call_oauth(self, http_method, path, data=None, params=None):
+    def _perform_http_call_oauth(self, http_method, path, data=None, params=None, idempotency_key=None, headers=None):
         url, data, params = self._format_request_data(path, data, params)
+        headers = self._get_headers(idempotency_key, headers)
+        return self._send(self._oauth_client, http_method, url, headers, params, data)
+
+    def _send(self, session, http_method, url, headers, params, data):
+        """Send a request, retrying it according to the retry policy, and guarded by the circuit breaker."""
+        if not self.circuit_breaker:
+            return self._send_with_retries(session, http_method, url, headers, params, data)
+        # once per request: its retries are part of the same trial while the circuit is half-open
+        self.circuit_breaker.before_request()
         try:
-            response = self._oauth_client.request(
-                method=http_method,
-                url=url,
-                headers={
-                    "Accept": "application/json",
-                    "Content-Type": "application/json",
-                    "User-Agent": self.user_agent,
-                    "X-Mollie-Client-Info": self.UNAME,
-                },
-                params=params,
-                data=data,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.RequestException as err:
-            raise RequestError(f"Unable to communicate with Mollie: {err}")
-        return response
-
-    def perform_http_call(self, http_method, path, data=None, params=None):
+            return self._send_with_retries(session, http_method, url, headers, params, data)
+        except RequestError:
+            raise  # the outcome is already recorded
+        except Exception:
+            # e.g. a failed OAuth token refresh: record it, or a half-open circuit would never close again
+            self.circuit_breaker.record_failure()
+            raise
+
+    def _send_with_retries(self, session, http_method, url, headers, params, data):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = session.request(
+                    method=http_method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    data=data,
+                    timeout=self.timeout,
+                )
+            except requests.exceptions.RequestException as err:
+                failure = CONNECT_ERROR if is_connect_error(err) else READ_ERROR
+                delay = self._get_retry_delay(attempt, start, http_method, headers, failure)
+                if delay is None:
+                    raise RequestError(f"Unable to communicate with Mollie: {err}")
+            else:
+                retry_after = response.headers.get("Retry-After")
+                delay = self._get_retry_delay(attempt, start, http_method, headers, response.status_code, retry_after)
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    def _get_retry_delay(self, attempt, start, http_method, headers, failure, retry_after=None):
+        """Return the delay before retrying a request, or None when the request is done.
+
+        When it is done, the outcome of the request is recorded in the circuit breaker.
+        """
+        failed = failure in (CONNECT_ERROR, READ_ERROR) or failure == 429 or failure >= 500
+        delay = None
+        if failed:
+            elapsed = time.monotonic() - start
+            delay = self.retry_policy.get_delay(attempt, elapsed, http_method, headers, failure, retry_after)
+        if delay is None and self.circuit_breaker:
+            if failed:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+        return delay
+
+    def perform_http_call(self, http_method, path, data=None, params=None, idempotency_key=None, headers=None):
+        """Perform an HTTP request to the API.
+
+        :param idempotency_key: Sent as the Idempotency-Key header, so a retried request that creates
+            something returns the result of the first request instead of creating it again (string)
+        :param headers: Additional request headers (dict)
+        """
         if self._oauth_client:
-            return self._perform_http_call_oauth(http_method, path, data=data, params=params)
+            return self._perform_http_call_oauth(
+                http_method, path, data=data, params=params, idempotency_key=idempotency_key, headers=headers
+            )
         else:
-            return self._perform_http_call_apikey(http_method, path, data=data, params=params)
+            return self._perform_http_call_apikey(
+                http_method, path, data=data, params=params, idempotency_key=idempotency_key, headers=headers
+            )
+
+    @staticmethod
+    def process_response(response, *handlers):
+        """Pass the response of perform_http_call() through the handlers, in order.
+
+        Handlers that are None are skipped. The AsyncClient overrides this to await the response first.
+        """
+        for handler in handlers:
+            if handler is not None:
+                response = handler(response)
+        return response
 
     def setup_oauth(self, client_id, client_secret, redirect_uri, scope, token, set_token):
         """
@@ -294,10 +374,12 @@ class Client(object):
         return self.access_token
 
     def _setup_retry(self):
-        """Configure a retry behaviour on the HTTP client."""
-        if self.retry:
-            retry = Retry(connect=self.retry, backoff_factor=1)
-            adapter = requests.adapters.HTTPAdapter(max_retries=retry)
+        """Configure the connection pool on the HTTP client.
+
+        Retries are done by the client itself, according to the retry policy, rather than by the HTTP client.
+        """
+        if self.pool_maxsize:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.pool_maxsize)
 
             if self._client:
                 self._client.mount("https://", adapter)
@@ -305,6 +387,15 @@ class Client(object):
                 self._oauth_client.mount("https://", adapter)
 
 
+def is_connect_error(err):
+    """Return True when a request failed before it reached the API, so it is always safe to retry."""
+    if isinstance(err, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(err, requests.exceptions.ConnectionError) and err.args:
+        return isinstance(getattr(err.args[0], "reason", err.args[0]), NewConnectionError)
+    return False
+
+
 def generate_querystring(params):
     """
     Generate a querystring suitable for use in the v2 api.
@@ -16,6 +16,12 @@ class RequestSetupError(RequestError):
     pass
 
 
+class CircuitOpenError(RequestError):
+    """Errors when requests aren't sent because the API failed too often recently."""
+
+    pass
+
+
 class IdentifierError(RequestSetupError):
     """Errors related to invalid resource identifiers that will be requested from the API."""
 
@@ -1,3 +1,7 @@
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+from ..serializers import get_default_serializer
 from .base import ObjectBase
 
 
@@ -11,6 +15,8 @@ class UnknownObject(ObjectBase):
 
 class ObjectList(ObjectBase):
     current = None
+    # Return the same object each time an index is accessed, rather than wrapping the item again.
+    memoize_objects = True
 
     def __init__(self, result, object_type, client=None):
         # If an empty dataset was injected, we mock the structure that the remainder of the clas expects.
@@ -23,53 +29,59 @@ class ObjectList(ObjectBase):
 
         super().__init__(result, client)
         self.object_type = object_type
+        self._items = self["_embedded"][object_type.get_object_name()]
+        self._objects = {}
 
     def __len__(self):
         """Return the count field."""
         return self.count
 
     def __iter__(self):
-        """Implement iterator interface."""
-        self.current = None
-        return self
+        """Return a new iterator, so nested or concurrent loops over the same list don't interfere."""
+        return ObjectListIterator(self)
 
     def __next__(self):
-        """Implement iterator interface."""
-        if self.current is None:
-            self.current = 0
-        else:
-            self.current += 1
-        try:
-            item = self["_embedded"][self.object_type.get_object_name()][self.current]
-            return self.object_type(item, self.client)
-        except IndexError:
+        """Step the cursor of the list itself, for use with `next(object_list)`."""
+        self.current = 0 if self.current is None else self.current + 1
+        if self.current >= len(self._items):
             self.current = None
             raise StopIteration
+        return self._get_object(self.current)
 
     def __getitem__(self, key):
         """Implement Sequence interface."""
-        object_name = self.object_type.get_object_name()
         if isinstance(key, int):
             # Return an index-based search from the "_embedded" dataset
-            item = self["_embedded"][object_name][key]
-            return self.object_type(item, self.client)
+            return self._get_object(key)
 
         if isinstance(key, slice):
-            _start = key.start or 0
-            _stop = key.stop or self["count"]
-            _step = key.step or 1
-            sliced_data = [self["_embedded"][object_name][x] for x in range(_start, _stop, _step)]
-            # Now we mock a result based on the sliced data
+            # The slice is a view on the items of this list, they aren't copied
+            if isinstance(self._items, ItemsView):
+                items = self._items[key]
+            else:
+                items = ItemsView(self._items, range(len(self._items))[key])
             sliced_result = {
                 "_embedded": {
-                    object_name: sliced_data,
+                    self.object_type.get_object_name(): items,
                 },
-                "count": len(sliced_data),
+                "count": len(items),
             }
-            return ObjectList(sliced_result, self.object_type, self.client)
+            return self._get_object_list(sliced_result)
 
         return super().__getitem__(key)
 
+    def _get_object(self, index):
+        item = self._items[index]
+        if not self.memoize_objects:
+            return self.object_type(item, self.client)
+        if index < 0:
+            index += len(self._items)
+        try:
+            return self._objects[index]
+        except KeyError:
+            obj = self._objects[index] = self.object_type(item, self.client)
+            return obj
+
     @property
     def count(self):
         if "count" not in self:
@@ -88,12 +100,119 @@ class ObjectList(ObjectBase):
         """Return the next set of objects in an ObjectList."""
         url = self._get_link("next")
         resource = self.object_type.get_resource_class(self.client)
-        resp = resource.perform_api_call(resource.REST_READ, url)
-        return ObjectList(resp, self.object_type, self.client)
+        return resource.perform_api_call(resource.REST_READ, url, then=self._get_object_list)
 
     def get_previous(self):
         """Return the previous set of objects in an ObjectList."""
         url = self._get_link("previous")
         resource = self.object_type.get_resource_class(self.client)
-        resp = resource.perform_api_call(resource.REST_READ, url)
-        return ObjectList(resp, self.object_type, self.client)
+        return resource.perform_api_call(resource.REST_READ, url, then=self._get_object_list)
+
+    def auto_paging_iter(self, prefetch=True):
+        """Return a generator over the objects of this set and of all following sets.
+
+        Following sets are only retrieved when the iteration reaches them. When `prefetch` is enabled,
+        the next set is retrieved in the background while the objects of the current set are consumed.
+        At most two sets are held in memory at any time, so even very long lists are streamed.
+        """
+        return _iter_pages(self, prefetch)
+
+    def _get_object_list(self, result):
+        return self.__class__(result, self.object_type, self.client)
+
+
+class ObjectListIterator(object):
+    """Iterator over the objects of an ObjectList, with a position of its own."""
+
+    __slots__ = ("_object_list", "_index")
+
+    def __init__(self, object_list):
+        self._object_list = object_list
+        self._index = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._index >= len(self._object_list._items):
+            raise StopIteration
+        obj = self._object_list._get_object(self._index)
+        self._index += 1
+        return obj
+
+
+class ItemsView(Sequence):
+    """A read-only view on a range of the items of another sequence, which shares the items instead of copying."""
+
+    __slots__ = ("_items", "_indices")
+
+    def __init__(self, items, indices):
+        self._items = items
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ItemsView(self._items, self._indices[index])
+        try:
+            return self._items[self._indices[index]]
+        except IndexError:
+            raise IndexError("list index out of range") from None
+
+
+class EncodedItems(Sequence):
+    """A sequence of API objects kept as encoded JSON, each decoded again when it is accessed."""
+
+    __slots__ = ("_encoded", "_serializer")
+
+    def __init__(self, items, serializer):
+        self._encoded = [serializer.dumps(item) for item in items]
+        self._serializer = serializer
+
+    def __len__(self):
+        return len(self._encoded)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._serializer.loads(item) for item in self._encoded[index]]
+        return self._serializer.loads(self._encoded[index])
+
+
+class CompactObjectList(ObjectList):
+    """An ObjectList that keeps its objects as encoded JSON instead of as decoded dictionaries.
+
+    Encoded JSON takes a fraction of the memory, which matters when keeping many sets of results around.
+    Objects are decoded each time they are accessed, and behave exactly like those of a regular ObjectList.
+
+    The response is still decoded in full before its items are encoded again, so while a CompactObjectList
+    is created the peak memory is that of a regular ObjectList, and each item is encoded and decoded once more.
+    """
+
+    # keeping the decoded objects around would undo the savings
+    memoize_objects = False
+
+    def __init__(self, result, object_type, client=None):
+        super().__init__(result, object_type, client)
+        if isinstance(self._items, list):
+            # Items of a response rather than of a slice, which already shares the encoded items
+            serializer = getattr(client, "serializer", None) or get_default_serializer()
+            self._items = EncodedItems(self._items, serializer)
+            # replace rather than modify "_embedded", the result may be shared with a response cache
+            self["_embedded"] = {self.object_type.get_object_name(): self._items}
+
+
+def _iter_pages(page, prefetch):
+    # Kept out of the ObjectList so the generator doesn't hold on to the first set while iterating.
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="mollie-paging") as executor:
+        while page is not None:
+            next_page = None
+            if page.has_next():
+                next_page = executor.submit(page.get_next) if prefetch else page.get_next
+            object_type, client, items = page.object_type, page.client, page._items
+            page = None
+            for item in items:
+                yield object_type(item, client)
+            if next_page is not None:
+                page = next_page.result() if prefetch else next_page()
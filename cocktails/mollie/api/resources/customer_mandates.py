@@ -21,8 +21,7 @@ class CustomerMandates(ResourceBase):
         return f"customers/{self.customer_id}/mandates"
 
     def with_parent_id(self, customer_id):
-        self.customer_id = customer_id
-        return self
+        return self._bind(customer_id=customer_id)
 
     def on(self, customer):
         return self.with_parent_id(customer.id)
@@ -14,5 +14,4 @@ class Onboarding(ResourceBase):
 
     def create(self, resource_id, data=None, **params):
         path = self.get_resource_name() + "/" + str(resource_id)
-        result = self.perform_api_call(self.REST_CREATE, path, data, params)
-        return self.get_resource_object(result)
+        return self.perform_api_call(self.REST_CREATE, path, data, params, then=self.get_resource_object)
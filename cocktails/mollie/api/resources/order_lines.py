@@ -13,8 +13,7 @@ class OrderLines(ResourceBase):
         return OrderLine(result, self.client)
 
     def with_parent_id(self, order_id):
-        self.order_id = order_id
-        return self
+        return self._bind(order_id=order_id)
 
     def on(self, order):
         return self.with_parent_id(order.id)
@@ -27,8 +26,7 @@ class OrderLines(ResourceBase):
         with the orderline IDs and quantities in the request body.
         """
         path = self.get_resource_name()
-        result = self.perform_api_call(self.REST_DELETE, path, data=data)
-        return result
+        return self.perform_api_call(self.REST_DELETE, path, data=data)
 
     def update(self, resource_id, data=None, **params):
         """
@@ -40,9 +38,11 @@ class OrderLines(ResourceBase):
         If you wish to retrieve the order object, you can do so by using the order_id property of the orderline.
         """
         path = self.get_resource_name() + "/" + str(resource_id)
-        result = self.perform_api_call(self.REST_UPDATE, path, data=data)
 
-        for line in result["lines"]:
-            if line["id"] == resource_id:
-                return self.get_resource_object(line)
-        raise DataConsistencyError(f"Line id {resource_id} not found in response.")
+        def get_line(result):
+            for line in result["lines"]:
+                if line["id"] == resource_id:
+                    return self.get_resource_object(line)
+            raise DataConsistencyError(f"Line id {resource_id} not found in response.")
+
+        return self.perform_api_call(self.REST_UPDATE, path, data=data, then=get_line)
@@ -15,13 +15,16 @@ class Orders(ResourceBase):
                 f"Invalid order ID: '{order_id}'. An order ID should start with '{self.RESOURCE_ID_PREFIX}'."
             )
 
-        result_order = super().get(order_id, **params)
-
         requested_embeds = self.extract_embed(params)
-        if requested_embeds:
-            result_order.requested_embeds = requested_embeds
 
-        return result_order
+        def get_order(result):
+            order = self.get_resource_object(result)
+            if requested_embeds:
+                order.requested_embeds = requested_embeds
+            return order
+
+        path = self.get_resource_name() + "/" + str(order_id)
+        return self.perform_api_call(self.REST_READ, path, params=params, then=get_order)
 
     def delete(self, order_id, data=None):
         """Cancel order and return the order object.
@@ -33,5 +36,5 @@ class Orders(ResourceBase):
             raise IdentifierError(
                 f"Invalid order ID: '{order_id}'. An order ID should start with '{self.RESOURCE_ID_PREFIX}'."
             )
-        result = super().delete(order_id, data)
-        return self.get_resource_object(result)
+        path = self.get_resource_name() + "/" + str(order_id)
+        return self.perform_api_call(self.REST_DELETE, path, data, then=self.get_resource_object)
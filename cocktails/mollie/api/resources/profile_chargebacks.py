@@ -8,8 +8,7 @@ class ProfileChargebacks(Chargebacks):
         return f"chargebacks?profileId={self.profile_id}"
 
     def with_parent_id(self, profile_id):
-        self.profile_id = profile_id
-        return self
+        return self._bind(profile_id=profile_id)
 
     def on(self, profile):
         return self.with_parent_id(profile.id)
@@ -8,8 +8,7 @@ class SettlementRefunds(Refunds):
         return f"settlements/{self.settlement_id}/refunds"
 
     def with_parent_id(self, settlement_id):
-        self.settlement_id = settlement_id
-        return self
+        return self._bind(settlement_id=settlement_id)
 
     def on(self, settlement):
         return self.with_parent_id(settlement.id)
@@ -12,8 +12,7 @@ class Shipments(ResourceBase):
         return f"orders/{self.order_id}/shipments"
 
     def with_parent_id(self, order_id):
-        self.order_id = order_id
-        return self
+        return self._bind(order_id=order_id)
 
     def on(self, order):
         return self.with_parent_id(order.id)
@@ -9,9 +9,7 @@ class SubscriptionPayments(Payments):
         return f"customers/{self.customer_id}/subscriptions/{self.subscription_id}/payments"
 
     def with_parent_id(self, customer_id, subscription_id):
-        self.customer_id = customer_id
-        self.subscription_id = subscription_id
-        return self
+        return self._bind(customer_id=customer_id, subscription_id=subscription_id)
 
     def on(self, subscription):
         # TODO: A request has been filed to mollie to add the customer id to the subscription response.
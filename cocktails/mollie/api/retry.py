@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .error import CircuitOpenError
+
+CONNECT_ERROR = "connect"
+READ_ERROR = "read"
+
+
+class RetryPolicy(object):
+    """Decide whether, and after how long, a failed request to the API is retried.
+
+    - Connection errors and 429 Too Many Requests are always retried, since the API didn't handle the request.
+    - Read errors and 502, 503 and 504 responses are only retried for idempotent requests: GET and DELETE
+      requests, and requests that carry an Idempotency-Key header.
+    - Retries are delayed with a jittered exponential backoff, or by the time the API asks for in the Retry-After
+      header. Retries that would end after `deadline` seconds since the first attempt are not done.
+    """
+
+    IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "DELETE")
+    RETRY_STATUSES = (429, 502, 503, 504)
+    ALWAYS_RETRY = (CONNECT_ERROR, 429)
+
+    def __init__(self, retries=3, backoff_factor=0.5, backoff_max=8, deadline=20, respect_retry_after=True):
+        """
+        :param retries: The maximum number of retries of a request (integer)
+        :param backoff_factor: The base delay in seconds, doubled on each retry (float)
+        :param backoff_max: The maximum delay in seconds between two attempts (float)
+        :param deadline: The time in seconds after the first attempt by which all retries must be done (float)
+        :param respect_retry_after: Whether to wait as long as the Retry-After header of a response asks (boolean)
+        """
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.respect_retry_after = respect_retry_after
+
+    def is_idempotent(self, method, headers):
+        return method.upper() in self.IDEMPOTENT_METHODS or "Idempotency-Key" in headers
+
+    def get_backoff(self, attempt):
+        """Return the delay before a retry, half of it fixed and half of it random."""
+        backoff = min(self.backoff_max, self.backoff_factor * 2**attempt)
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def get_delay(self, attempt, elapsed, method, headers, failure, retry_after=None):
+        """Return the delay in seconds before retrying a failed request, or None when it shouldn't be retried.
+
+        :param attempt: The number of retries done so far (integer)
+        :param elapsed: The time in seconds since the first attempt (float)
+        :param failure: CONNECT_ERROR, READ_ERROR or the HTTP status code of the response
+        :param retry_after: The value of the Retry-After header of the response (string)
+        """
+        if attempt >= self.retries:
+            return None
+        if failure not in self.ALWAYS_RETRY:
+            if failure != READ_ERROR and failure not in self.RETRY_STATUSES:
+                return None
+            if not self.is_idempotent(method, headers):
+                return None
+        delay = self.get_backoff(attempt)
+        if retry_after and self.respect_retry_after:
+            delay = max(delay, parse_retry_after(retry_after))
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return None
+        return delay
+
+
+def parse_retry_after(value):
+    """Return the number of seconds to wait according to a Retry-After header value."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CircuitBreaker(object):
+    """Fail fast while the API is unavailable.
+
+    After `failure_threshold` consecutive failed requests (connection errors, or 429 and 5xx responses after all
+    retries) the circuit opens: requests raise a CircuitOpenError without contacting the API. After
+    `recovery_timeout` seconds a single trial request is let through; the circuit closes again when it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError("The Mollie API is unavailable, not sending the request.")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
@@ -0,0 +1,50 @@
+from decimal import ROUND_HALF_UP, Decimal
+from django.db import models
+
+CURRENCY = 'EUR'
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def MoneyField(**kwargs):
+    """Return a field for an amount in euros, stored exactly with two decimals."""
+    kwargs.setdefault('max_digits', 10)
+    kwargs.setdefault('decimal_places', 2)
+    return models.DecimalField(**kwargs)
+
+
+def to_money(value):
+    """Return an amount as a Decimal rounded to the cent, half up.
+
+    Floats are converted through their shortest representation, so 12.35 becomes
+    Decimal('12.35') and not the binary approximation 12.3499999...
+    """
+    if value is None:
+        return ZERO
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def format_amount(value):
+    """Return an amount as the two-decimal string Mollie expects as ``amount.value``, e.g. '100.00'."""
+    return '{:.2f}'.format(to_money(value))
+
+
+def mollie_amount(value, currency=CURRENCY):
+    """Return the Mollie ``amount`` object of an amount."""
+    return {'currency': currency, 'value': format_amount(value)}
+
+
+def cart_totals(lines):
+    """Return the subtotal and the discount of cart lines of (quantity, price, discount price).
+
+    The same computation as Order.aggregate_totals, which does it in SQL; a discount
+    price of None or zero, or above the price, means the cocktail is not discounted.
+    """
+    subtotal = discount = ZERO
+    for quantity, price, discount_price in lines:
+        final_price = min(price, discount_price or price)
+        subtotal += quantity * final_price
+        discount += quantity * (price - final_price)
+    return {'subtotal': to_money(subtotal), 'discount': to_money(discount)}
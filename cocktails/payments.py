@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.core.cache import cache
+from mollie.api.cache import ConditionalCache, ResponseCache
+from mollie.api.client import Client
+from mollie.api.error import Error
+from mollie.api.retry import CircuitBreaker, RetryPolicy
+from .cart import invalidate_cart_count
+from .models import Payment, PaymentIntent
+from .money import CURRENCY, format_amount, mollie_amount, to_money
+
+CHECKOUT_REPLAY_WINDOW = timedelta(minutes=15)
+
+_clients = {}
+_clients_lock = threading.Lock()
+_closed_stats = {'requests': 0, 'connections': 0}
+
+
+def _pools(client):
+    if client._client is None:
+        return []
+    pools = []
+    for adapter in client._client.adapters.values():
+        pools.extend(adapter.poolmanager.pools[key] for key in adapter.poolmanager.pools.keys())
+    return pools
+
+
+def _close_connections(client):
+    """Close the idle connections of a client, keeping their counters for connection_stats()."""
+    for pool in _pools(client):
+        _closed_stats['requests'] += pool.num_requests
+        _closed_stats['connections'] += pool.num_connections
+    client._client.close()
+
+
+def _get_response_cache():
+    ttls = getattr(settings, 'MOLLIE_RESPONSE_CACHE_TTLS', None)
+    return ResponseCache(ttls=ttls, backend=cache) if ttls else None
+
+
+def _get_conditional_cache():
+    maxsize = getattr(settings, 'MOLLIE_CONDITIONAL_CACHE_SIZE', 0)
+    return ConditionalCache(maxsize) if maxsize else None
+
+
+def get_mollie_client(api_key=None):
+    """Return the process-wide Mollie client for an API key.
+
+    One client, and so one HTTP connection pool, is shared by all requests and threads of
+    the process, so a checkout reuses an open TLS connection to the Mollie API. The pool
+    size is set with MOLLIE_POOL_MAXSIZE. Connections that have been idle for longer than
+    MOLLIE_KEEP_ALIVE seconds are closed rather than reused, as the API has most likely
+    dropped them by then. GET responses of the resources in MOLLIE_RESPONSE_CACHE_TTLS are
+    kept in the Django cache for the given number of seconds, and the ETags of the last
+    MOLLIE_CONDITIONAL_CACHE_SIZE GET responses are kept to make repeated polls conditional.
+
+    Failed requests are retried up to MOLLIE_RETRIES times, as long as that fits in
+    MOLLIE_RETRY_DEADLINE seconds. After MOLLIE_CIRCUIT_FAILURES failures in a row, requests
+    fail immediately for MOLLIE_CIRCUIT_RECOVERY seconds instead of keeping the visitor waiting.
+    """
+    api_key = api_key or settings.MOLLIE_SECRET_KEY
+    now = time.monotonic()
+    with _clients_lock:
+        if api_key not in _clients:
+            client = Client(
+                api_endpoint=getattr(settings, 'MOLLIE_API_ENDPOINT', None),
+                pool_maxsize=getattr(settings, 'MOLLIE_POOL_MAXSIZE', 10),
+                retry=RetryPolicy(retries=getattr(settings, 'MOLLIE_RETRIES', 3),
+                                  deadline=getattr(settings, 'MOLLIE_RETRY_DEADLINE', 10)),
+                circuit_breaker=CircuitBreaker(getattr(settings, 'MOLLIE_CIRCUIT_FAILURES', 5),
+                                               getattr(settings, 'MOLLIE_CIRCUIT_RECOVERY', 30)),
+                response_cache=_get_response_cache(),
+                conditional_cache=_get_conditional_cache(),
+            )
+            client.set_api_key(api_key)
+            _clients[api_key] = [client, now]
+        client, last_used = _clients[api_key]
+        if client._client is not None and now - last_used > getattr(settings, 'MOLLIE_KEEP_ALIVE', 60):
+            _close_connections(client)
+        _clients[api_key][1] = now
+    return client
+
+
+def connection_stats():
+    """Return the number of API requests and new connections, and the connection reuse rate."""
+    with _clients_lock:
+        stats = dict(_closed_stats)
+        for client, last_used in _clients.values():
+            for pool in _pools(client):
+                stats['requests'] += pool.num_requests
+                stats['connections'] += pool.num_connections
+    stats['reuse_rate'] = 1 - stats['connections'] / stats['requests'] if stats['requests'] else 0.0
+    return stats
+
+
+def payment_idempotency_key(order):
+    """Return the idempotency key of the payment of an order.
+
+    The key includes the amount, so an order whose cart changed after a failed attempt gets a
+    new payment instead of the one created for the old amount.
+    """
+    return '%s:%s' % (order.orderid, format_amount(order.total))
+
+
+def start_payment(order):
+    """Create the Mollie payment of an open order, at most once, and return its checkout URL.
+
+    The PaymentIntent is stored before calling the API and the checkout URL after, together with
+    the Payment and the order update in a single transaction. Retries replay the stored URL, and
+    a retry after a failure in between reuses the idempotency key, so Mollie returns the payment
+    it already created.
+    """
+    key = payment_idempotency_key(order)
+    intent, created = PaymentIntent.objects.get_or_create(
+        idempotency_key=key, defaults={'order': order, 'amount': order.total})
+    if intent.checkout_url:
+        return intent.checkout_url
+
+    amount = mollie_amount(order.total)
+    charge = get_mollie_client().payments.create({
+        'amount': amount,
+        'description': '%s by %s for %s%s' % (order.orderid, order.user, amount['value'], amount['currency']),
+        'redirectUrl': settings.PAYMENTREDIRECTURL,
+        'webhookUrl': settings.WEBHOOKURL,
+    }, idempotency_key=key)
+
+    with transaction.atomic():
+        intent = PaymentIntent.objects.select_for_update().get(pk=intent.pk)
+        if intent.checkout_url:
+            # a concurrent submit of the same order got here first
+            return intent.checkout_url
+        now = timezone.now()
+        Payment.objects.create(
+            mollie_payment_id=charge.id,
+            order_id=order.orderid,
+            user=order.user,
+            amount=order.total,
+            timestamp=now,
+            status=charge.status,
+            address=str(order.billing_address or ''),
+        )
+        order.mark_ordered(charge.id, now)
+        intent.mollie_payment_id = charge.id
+        intent.checkout_url = charge.checkout_url
+        intent.save(update_fields=['mollie_payment_id', 'checkout_url'])
+        invalidate_cart_count(order.user)
+    return intent.checkout_url
+
+
+def get_open_checkout_url(user):
+    """Return the checkout URL of a recent payment of the user that is still open, if any."""
+    open_payment = Payment.objects.filter(mollie_payment_id=OuterRef('mollie_payment_id'), status='open')
+    intent = PaymentIntent.objects.filter(
+        order__user=user,
+        order__paid=False,
+        created__gte=timezone.now() - CHECKOUT_REPLAY_WINDOW,
+        checkout_url__isnull=False,
+    ).filter(Exists(open_payment)).order_by('-created').first()
+    return intent.checkout_url if intent else None
+
+
+def accepts_amount(method, amount):
+    """Return whether an amount in euros lies within the minimum and maximum amount of a payment method."""
+    minimum, maximum = method.minimum_amount, method.maximum_amount
+    if minimum and minimum['currency'] == CURRENCY and amount < Decimal(minimum['value']):
+        return False
+    if maximum and maximum['currency'] == CURRENCY and amount > Decimal(maximum['value']):
+        return False
+    return True
+
+
+def get_payment_methods(order):
+    """Return the payment methods available for the amount of an order, or none if the API is unreachable.
+
+    The methods are listed without an amount, so the cached response serves every order, and are
+    filtered on their minimum and maximum amount here.
+    """
+    try:
+        methods = list(get_mollie_client().methods.list())
+    except Error:
+        return []
+    total = to_money(order.total)
+    return [method for method in methods if accepts_amount(method, total)]
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+RENDITION_WIDTHS = (320, 640, 960, 1280)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+                               thread_name_prefix='renditions')
+
+
+def rendition_name(name, digest, width, extension):
+    """Return the content-hashed storage name of one rendition of ``name``."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'renditions', f'{stem}.{digest}.{width}w.{extension}')
+
+
+def build_renditions(image_file):
+    """Write the width-bucketed WebP and JPEG renditions of an image file to storage.
+
+    Returns the name of the source and, per format, a mapping of width to storage name.
+    Renditions are never wider than the original, and since the names carry a hash of the
+    source content, a rendition that already exists is reused instead of encoded again.
+    """
+    image_file.open('rb')
+    try:
+        source = image_file.read()
+    finally:
+        image_file.close()
+    digest = hashlib.sha1(source).hexdigest()[:12]
+
+    image = ImageOps.exif_transpose(Image.open(BytesIO(source)))
+    widths = [width for width in RENDITION_WIDTHS if width < image.width] or [image.width]
+
+    renditions = {'source': image_file.name}
+    renditions.update({extension: {} for extension in RENDITION_FORMATS})
+    for width in widths:
+        resized = None
+        for extension, (image_format, options) in RENDITION_FORMATS.items():
+            name = rendition_name(image_file.name, digest, width, extension)
+            if not default_storage.exists(name):
+                if resized is None:
+                    height = round(image.height * width / image.width)
+                    resized = image.convert('RGB').resize((width, height), Image.LANCZOS)
+                output = BytesIO()
+                resized.save(output, image_format, **options)
+                name = default_storage.save(name, ContentFile(output.getvalue()))
+            renditions[extension][str(width)] = name
+    return renditions
+
+
+def generate_renditions(model, pk):
+    """Build the renditions of one object and record them on its ``image_renditions`` field."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return
+    try:
+        instance.image_renditions = build_renditions(instance.image)
+    except (OSError, ValueError):
+        logger.exception('Could not build renditions for %s %s', model.__name__, pk)
+        return
+    instance.save(update_fields=['image_renditions'])
+
+
+def generate_renditions_in_worker(model, pk):
+    """Run generate_renditions() on a worker thread.
+
+    The worker threads outlive requests, so like a request they drop their database
+    connection when it has expired or broken, before and after the work.
+    """
+    close_old_connections()
+    try:
+        generate_renditions(model, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(sender, instance, update_fields=None, **kwargs):
+    """post_save receiver that hands new uploads to the background rendition worker."""
+    if update_fields and set(update_fields) == {'image_renditions'}:
+        return
+    if not instance.image or instance.image_renditions.get('source') == instance.image.name:
+        return
+    if getattr(settings, 'IMAGE_RENDITIONS_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(generate_renditions_in_worker, sender, instance.pk))
+    else:
+        transaction.on_commit(lambda: generate_renditions(sender, instance.pk))
@@ -0,0 +1,23 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cart import merge_session_cart
+from .catalog import bump_catalog_version
+from .models import Cocktails, Order, refresh_order_totals
+from .renditions import schedule_renditions
+
+post_save.connect(schedule_renditions, sender=Cocktails, dispatch_uid='cocktails_renditions')
+user_logged_in.connect(merge_session_cart, dispatch_uid='cocktails_merge_session_cart')
+
+
+@receiver(post_save, sender=Cocktails)
+@receiver(post_delete, sender=Cocktails)
+def cocktail_changed(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Cocktails)
+def cocktail_price_changed(sender, instance, created, **kwargs):
+    # keep the totals of the carts holding the cocktail in line with its price
+    if not created:
+        refresh_order_totals(Order.objects.filter(ordered=False, items__item=instance))
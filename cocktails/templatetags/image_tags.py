@@ -0,0 +1,41 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+register= template.Library()
+
+
+def _srcset(names):
+    return ', '.join('{} {}w'.format(default_storage.url(name), width)
+                     for width, name in sorted(names.items(), key=lambda rendition: int(rendition[0])))
+
+
+@register.simple_tag
+def responsive_image(obj, sizes='100vw', css_class='', alt=''):
+    """Render the image of ``obj`` as a <picture> with WebP and JPEG srcsets.
+
+    Falls back to the original upload as long as the renditions are not generated yet.
+    """
+    renditions = obj.image_renditions
+    if not renditions.get('jpeg'):
+        return format_html('<img alt="{}" class="{}" src="{}">', alt, css_class, obj.image.url)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img alt="{}" class="{}" src="{}" srcset="{}" sizes="{}" loading="lazy"></picture>',
+        _srcset(renditions['webp']), sizes,
+        alt, css_class, rendition_url(obj, 0), _srcset(renditions['jpeg']), sizes,
+    )
+
+
+@register.filter
+def rendition_url(obj, width):
+    """Return the URL of the widest JPEG rendition of ``obj`` not wider than ``width``.
+
+    A width of 0 selects the widest rendition available.
+    """
+    names = obj.image_renditions.get('jpeg')
+    if not names:
+        return obj.image.url
+    widths = sorted(int(w) for w in names)
+    fitting = [w for w in widths if not width or w <= int(width)] or widths[:1]
+    return default_storage.url(names[str(fitting[-1])])
@@ -4,15 +4,20 @@ from logging import NullHandler
 from urllib import request
 from django.shortcuts import render, get_object_or_404, redirect
 from jurgmeister.settings import MOLLIE_SECRET_KEY, PAYMENTREDIRECTURL, WEBHOOKURL
-from .models import Cocktails, Order, OrderItem, BillingAddress, Payment
+from .models import CATEGORY_CHOICES, DELIVERY_COST, Cocktails, Order, OrderItem, BillingAddress, Payment
 from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseRedirect, HttpResponseForbidden, HttpRequest
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, HttpResponseForbidden, HttpRequest
 from django.views import View
 from django.core.exceptions import ObjectDoesNotExist
 from .forms import CheckoutForm
+from .money import ZERO
+from .cart import SessionCart, get_cart
+from .catalog import clean_catalog_params, get_catalog_etag, get_catalog_last_modified, get_catalog_page
+from .payments import get_open_checkout_url, get_payment_methods, start_payment
+from .webhooks import MOLLIE_PAYMENT_ID, enqueue_notification
 from mollie.api.client import Client
 from mollie.api.error import Error
 from django.conf import settings
@@ -20,98 +25,81 @@ from django.core.mail import send_mail
 import os
 import flask
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
 
 
 def pripol(request):
     return redirect("pripol")
 
 # COCKTAILS
+def _catalog_etag(request):
+    # pending flash messages must be rendered, never answered with a 304
+    if len(messages.get_messages(request)):
+        return None
+    category, after = clean_catalog_params(request.GET)
+    cart_item_count = get_cart(request).count()
+    return get_catalog_etag(request, category, after, cart_item_count)
+
+
+def _catalog_last_modified(request):
+    # a page with a cart depends on it, which only the ETag covers
+    if request.user.is_authenticated or SessionCart(request.session).exists() or len(messages.get_messages(request)):
+        return None
+    return get_catalog_last_modified()
+
+
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
 def allcocktails(request):
-    cocktails = Cocktails.objects
-    return render(request, 'cocktails/allcocktails.html', {'cocktails': cocktails})
+    category, after = clean_catalog_params(request.GET)
+    page = get_catalog_page(category, after)
+    context = {
+        'cards': page['cards'],
+        'next_after': page['next_after'],
+        'category': category,
+        'categories': CATEGORY_CHOICES,
+    }
+    return render(request, 'cocktails/allcocktails.html', context)
     
 def detail(request, cocktail_id):
     detailcocktail = get_object_or_404(Cocktails, pk=cocktail_id)
     return render(request, 'cocktails/detail.html', {'cocktail': detailcocktail})
 
-@login_required(login_url="/accounts/login")
 def add_to_cart(request, cocktail_id):
     item = get_object_or_404(Cocktails, pk=cocktail_id)
-    order_item, created = OrderItem.objects.get_or_create(
-        item=item,
-        user=request.user,
-        ordered=False
-    )
-    #get all unordered orders of that user
-    order_qs = Order.objects.filter(user=request.user, ordered=False)
-    if order_qs.exists():
-        #if it exists take top order
-        order = order_qs[0]
-        # check if the item is already in the order
-        if order.items.filter(item__pk=item.pk).exists():
-            #if it is than augment the quantity with 1
-            order_item.quantity += 1
-            order_item.save()
-            messages.success(request, "1 " + item.title + " is aan je wagentje toegevoegd. Je hebt nu " + str(order_item.quantity) + " " + item.title + "'s in je wagentje.")
-            return redirect("allcocktails")
-        #if the item is not yet in the order than add the item to the order
-        else:
-            order.items.add(order_item)
-            messages.success(request, "1 " + item.title + " is aan je wagentje toegevoegd. Je hebt nu " + str(order_item.quantity) + " " + item.title + "'s in je wagentje.")
-            return redirect("allcocktails")
-    #if there's no unordered order for that user
+    quantity = get_cart(request).add_item(item)
+    if quantity > 1:
+        messages.success(request, "1 " + item.title + " is aan je wagentje toegevoegd. Je hebt nu " + str(quantity) + " " + item.title + "'s in je wagentje.")
     else:
-        ordered_date = timezone.now()
-        order = Order.objects.create(
-            user=request.user, start_date=ordered_date)
-        order.items.clear()
-        order.items.add(order_item)
         messages.success(request, "1 " + item.title + " werd aan je wagentje toegevoegd.")
-        return redirect("allcocktails")
+    return redirect("allcocktails")
 
 
-@login_required(login_url="/accounts/login")
 def remove_from_cart(request, cocktail_id):
     item = get_object_or_404(Cocktails, pk=cocktail_id)
-    order_qs = Order.objects.filter(
-        user=request.user,
-        ordered=False
-    )
-    if order_qs.exists():
-        order = order_qs[0]
-        # check if the order item is in the order
-        if order.items.filter(item__pk=item.pk).exists():
-            order_item = OrderItem.objects.filter(
-                item=item,
-                user=request.user,
-                ordered=False
-            )[0]
-            # if more than one item in cart remove just one
-            if order_item.quantity > 1:
-                order_item.quantity -= 1
-                order_item.save()
-                messages.warning(request, "1 " + item.title + " werd verwijderd. Je hebt nu " + str(order_item.quantity) + " " + item.title + "'s in je wagentje.")
-                return redirect("allcocktails")
-            # if only 1, then delete the item from the cart.
-            else:
-                order_item.delete()
-                messages.info(request, "De laatste " + item.title + " werd verwijderd uit je wagentje.")
-                return redirect("allcocktails")
-
-        else:
-            # add a message saying the order does not contain the item
-            messages.warning(request, "Er is geen "+ item.title +" in je wagentje.")
-            return redirect("allcocktails")
+    cart = get_cart(request)
+    quantity = cart.remove_item(item)
+    if quantity:
+        messages.warning(request, "1 " + item.title + " werd verwijderd. Je hebt nu " + str(quantity) + " " + item.title + "'s in je wagentje.")
+    elif quantity == 0:
+        messages.info(request, "De laatste " + item.title + " werd verwijderd uit je wagentje.")
+    elif cart.exists():
+        # add a message saying the order does not contain the item
+        messages.warning(request, "Er is geen "+ item.title +" in je wagentje.")
     else:
         # add a message saying the user does not have an order
         messages.warning(request, "Je hebt geen actieve bestelling. Voeg aub eerst cocktails toe aan je wagentje.")
-        return redirect("allcocktails")
+    return redirect("allcocktails")
 
 # ORDER-SUMMARY
-class OrderSummaryView(LoginRequiredMixin, View):
+class OrderSummaryView(View):
     def get(self, *args, **kwargs):
         try:
-            order = Order.objects.get(user=self.request.user, ordered=False)
+            if self.request.user.is_authenticated:
+                order = Order.objects.with_lines().get(user=self.request.user, ordered=False)
+            elif SessionCart(self.request.session).exists():
+                order = SessionCart(self.request.session)
+            else:
+                raise ObjectDoesNotExist
             context = {
                 'object': order
             }
@@ -121,104 +109,47 @@ class OrderSummaryView(LoginRequiredMixin, View):
             return redirect("allcocktails")
 
 
-@login_required(login_url="/accounts/login")
 def add_to_cart_summary(request, cocktail_id):
     item = get_object_or_404(Cocktails, pk=cocktail_id)
-    order_item, created = OrderItem.objects.get_or_create(
-        item=item,
-        user=request.user,
-        ordered=False
-    )
-    order_qs = Order.objects.filter(user=request.user, ordered=False)
-    if order_qs.exists():
-        order = order_qs[0]
-        # check if the order item is in the order
-        if order.items.filter(item__pk=item.pk).exists():
-            order_item.quantity += 1
-            order_item.save()
-            messages.info(request, "1 " + item.title + " werd aan je wagentje toegevoegd.")
-            return redirect("order-summary")
-        else:
-            messages.info(request, "1 " + item.title + " werd aan je wagentje toegevoegd.")
-            order.items.add(order_item)
-            return redirect("order-summary")
-    else:
-        ordered_date = timezone.now()
-        order = Order.objects.create(
-            user=request.user, start_date=ordered_date)
-        order.items.delete(all)
-        order.items.add(order_item)
-        messages.info(request, "1 " + item.title + " werd aan je wagentje toegevoegd.")
-        return redirect("order-summary")
+    get_cart(request).add_item(item)
+    messages.info(request, "1 " + item.title + " werd aan je wagentje toegevoegd.")
+    return redirect("order-summary")
 
 
-@login_required(login_url="/accounts/login")
 def remove_from_cart_summary(request, cocktail_id):
     item = get_object_or_404(Cocktails, pk=cocktail_id)
-    order_qs = Order.objects.filter(
-        user=request.user,
-        ordered=False
-    )
-    if order_qs.exists():
-        order = order_qs[0]
-        # check if the order item is in the order
-        if order.items.filter(item__pk=item.pk).exists():
-            order_item = OrderItem.objects.filter(
-                item=item,
-                user=request.user,
-                ordered=False
-            )[0]
-            # if more than one item in cart remove just one
-            if order_item.quantity > 1:
-                order_item.quantity -= 1
-                order_item.save()
-                messages.info(
-                    request, "1 " + item.title + " werd uit je wagentje verwijderd.")
-                return redirect("order-summary")
-            # if only 1, then delete the item from the cart.
-            else:
-                order_item.delete()
-                messages.info(
-                    request, "De laatste " + item.title + " werd uit je wagentje verwijderd.")
-                return redirect("order-summary")
-
-        else:
-            # add a message saying the order does not contain the item
-            messages.info(request, "Geen " + item.title + " in je wagentje of je hebt nog geen actieve bestelling.")
-            return redirect("order-summary")
+    cart = get_cart(request)
+    quantity = cart.remove_item(item)
+    if quantity:
+        messages.info(
+            request, "1 " + item.title + " werd uit je wagentje verwijderd.")
+    elif quantity == 0:
+        messages.info(
+            request, "De laatste " + item.title + " werd uit je wagentje verwijderd.")
+    elif cart.exists():
+        # add a message saying the order does not contain the item
+        messages.info(request, "Geen " + item.title + " in je wagentje of je hebt nog geen actieve bestelling.")
     else:
         # add a message saying the user does not have an order
         messages.info(request, "Je hebt geen actieve bestelling. Voeg aub eerst cocktails toe aan je wagentje.")
-        return redirect("order-summary")
+    return redirect("order-summary")
 
 
-@login_required(login_url="/accounts/login")
 def empty_cart(request, cocktail_id):
     item = get_object_or_404(Cocktails, pk=cocktail_id)
-    order_qs = Order.objects.filter(
-        user=request.user,
-        ordered=False
-    )
-    order_item = OrderItem.objects.filter(
-        item=item,
-        user=request.user,
-        ordered=False
-    )[0]
-    if order_qs.exists():
-        order_item.delete()
+    if get_cart(request).clear_item(item):
         messages.info(request, "De laatste " + item.title + " werd uit je wagentje verwijderd.")
-        return redirect("order-summary")
     else:
         # add a message saying the user does not have an order
         messages.info(request, "Je hebt geen actieve bestelling. Voeg aub eerst cocktails toe aan je wagentje.")
-        return redirect("order-summary")
+    return redirect("order-summary")
 
 # CheckoutForm
 class CheckoutView(LoginRequiredMixin, View):
     def get(self, *args, **kwargs):
         #orders + form
         try:
-            order = Order.objects.get(user=self.request.user, ordered=False)
+            order = Order.objects.with_lines().get(user=self.request.user, ordered=False)
             form = CheckoutForm()
             context = {
                 'object': order,
@@ -256,9 +187,10 @@ class CheckoutView(LoginRequiredMixin, View):
                 order.billing_address = billing_address
                 order.delivery_method = delivery_method
                 if delivery_method == "D":
-                    order.total = order.get_total_delivery()
+                    order.delivery = DELIVERY_COST
                 else:
-                    order.total = order.get_total()
+                    order.delivery = ZERO
+                order.refresh_totals()
                 order.save()
                 # TODO: create completely new order
                 return redirect("payment")
@@ -270,10 +202,11 @@ class CheckoutView(LoginRequiredMixin, View):
 class PaymentView(LoginRequiredMixin, View):
     def get(self, *args, **kwargs):
         try:
-            order = Order.objects.get(user=self.request.user, ordered=False)
+            order = Order.objects.with_lines().get(user=self.request.user, ordered=False)
             form = CheckoutForm()
             context = {
-                'order': order
+                'order': order,
+                'payment_methods': get_payment_methods(order),
             }
             return render(self.request, "cocktails/payment.html", context)
         except ObjectDoesNotExist:
@@ -283,47 +216,17 @@ class PaymentView(LoginRequiredMixin, View):
     def post(self, *args, **kwargs):
         try:
             order = Order.objects.get(user=self.request.user, ordered=False)
-            value = str(order.total) + '0'
-            orderid = str(order.orderid)
-            orderuser=str(order.user)
-            # Define new payment
-            mollie_client = Client()
-            mollie_client.set_api_key(MOLLIE_SECRET_KEY)
-            charge = mollie_client.payments.create({
-                'amount': {
-                    'currency': 'EUR',
-                    'value': value,
-                },
-                'description': orderid+" by "+orderuser+" for "+value+"EUR",
-                'redirectUrl': PAYMENTREDIRECTURL,
-                'webhookUrl': WEBHOOKURL,
-            })
-            # create the payment
-            payment = Payment()
-            payment.mollie_payment_id = charge.id
-            payment.order_id=order.orderid
-            payment.user = self.request.user
-            payment.amount = order.total
-            payment.timestamp = timezone.now()
-            payment.status=charge.status
-            payment.address = order.billing_address
-            payment.save()
-            # assign the payment to the order
-            order_items=order.items.all()
-            order_items.update(ordered = True)
-            order_items.update(ordered_timestamp = payment.timestamp)
-            for item in order_items:
-                item.save()
-            order.mollie_id = payment.mollie_payment_id
-            order.ordered = True
-            order.ordered_date = payment.timestamp
-            order.save()
-            return redirect(charge.checkout_url)
-
+            return redirect(start_payment(order))
         except ObjectDoesNotExist:
+            # a double submit or a retry after the payment was created: back to the same checkout
+            checkout_url = get_open_checkout_url(self.request.user)
+            if checkout_url:
+                return redirect(checkout_url)
             messages.error(self.request, "Je hebt geen actieve bestelling.")
             return redirect("order-summary")
-        #excepts toevoegen voor mollie errors + back in browser
+        except Error:
+            messages.error(self.request, "De betaling kon niet gestart worden, probeer het aub opnieuw.")
+            return redirect("payment")
 
 def your_account(request):
     return redirect('/cocktails')
@@ -332,7 +235,12 @@ def your_account(request):
 def end(request):
     return render(request,'cocktails/confirmation.html')
 
-def confirmation(request):  
-    id = request.POST['id']
-    print(id)
-    return "Success!"
\ No newline at end of file
+@csrf_exempt
+@require_POST
+def confirmation(request):
+    # Mollie only sends the payment id; the status is fetched by the webhook workers
+    mollie_id = request.POST.get('id', '')
+    if not MOLLIE_PAYMENT_ID.match(mollie_id):
+        return HttpResponseBadRequest()
+    enqueue_notification(mollie_id)
+    return HttpResponse()
@@ -0,0 +1,148 @@
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from mollie.api.error import Error, IdentifierError, ResponseError
+from .models import Order, Payment, WebhookEvent
+from .payments import get_mollie_client
+
+logger = logging.getLogger(__name__)
+
+MOLLIE_PAYMENT_ID = re.compile(r'^tr_\w+$')
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'MOLLIE_WEBHOOK_WORKERS', 4),
+                               thread_name_prefix='webhooks')
+_scheduled = set()
+_scheduled_lock = threading.Lock()
+
+
+def enqueue_notification(mollie_id):
+    """Durably record a webhook notification and schedule fetching the payment status.
+
+    Repeated notifications for the same payment are folded into one pending event, so a
+    burst of retries from Mollie results in a single status fetch.
+    """
+    now = timezone.now()
+    pending = {'received': now, 'notifications': F('notifications') + 1, 'pending': True}
+    with transaction.atomic():
+        if not WebhookEvent.objects.filter(mollie_id=mollie_id).update(**pending):
+            try:
+                with transaction.atomic():
+                    WebhookEvent.objects.create(mollie_id=mollie_id, received=now)
+            except IntegrityError:
+                # a concurrent notification created the event first
+                WebhookEvent.objects.filter(mollie_id=mollie_id).update(**pending)
+        transaction.on_commit(lambda: schedule_processing(mollie_id))
+
+
+def schedule_processing(mollie_id):
+    """Hand a pending event to the webhook workers, unless it is already waiting for one."""
+    with _scheduled_lock:
+        if mollie_id in _scheduled:
+            return
+        _scheduled.add(mollie_id)
+    if getattr(settings, 'MOLLIE_WEBHOOK_ASYNC', True):
+        _executor.submit(process_notification_in_worker, mollie_id)
+    else:
+        process_notification(mollie_id)
+
+
+def process_notification_in_worker(mollie_id):
+    """Run process_notification() on a webhook worker thread.
+
+    The worker threads outlive requests, so like a request they drop their database
+    connection when it has expired or broken, before and after the work.
+    """
+    close_old_connections()
+    try:
+        process_notification(mollie_id)
+    finally:
+        close_old_connections()
+
+
+def is_permanent_error(error):
+    """Return whether fetching the payment will never succeed, like for an unknown payment id.
+
+    Authentication and rate limit errors are ours to fix or wait out, so they aren't permanent.
+    """
+    if isinstance(error, IdentifierError):
+        return True
+    return isinstance(error, ResponseError) and 400 <= error.status < 500 and error.status not in (401, 429)
+
+
+def process_notification(mollie_id):
+    """Fetch the status of a notified payment and apply it, if the event is still pending.
+
+    Returns True when the event was processed. When the API can't be reached the event
+    stays pending, to be retried by the process_webhooks management command; when the
+    payment can't be fetched at all the event is marked failed.
+    """
+    with _scheduled_lock:
+        # from here on a new notification needs a new fetch
+        _scheduled.discard(mollie_id)
+    event = WebhookEvent.objects.filter(mollie_id=mollie_id, pending=True).first()
+    if event is None:
+        return False
+    try:
+        charge = get_mollie_client().payments.get(mollie_id)
+    except Error as error:
+        logger.exception('Could not fetch the status of payment %s', mollie_id)
+        if is_permanent_error(error):
+            fail_event(event, error)
+        return False
+    complete_event(event, charge)
+    return True
+
+
+def complete_event(event, charge):
+    """Apply the fetched status of a notified payment and mark the event processed."""
+    apply_payment_status(charge)
+    # only mark the event done if no notification arrived while fetching
+    WebhookEvent.objects.filter(pk=event.pk, notifications=event.notifications).update(
+        pending=False, processed=timezone.now(), error='')
+
+
+def fail_event(event, error):
+    """Stop processing an event whose payment can't be fetched, recording why."""
+    WebhookEvent.objects.filter(pk=event.pk, notifications=event.notifications).update(
+        pending=False, processed=timezone.now(), error=str(error)[:255])
+
+
+def apply_payment_status(charge):
+    """Store the status of a Mollie payment on our Payment and mark its Order paid.
+
+    Both updates only write when something changes, so applying a status twice is harmless.
+    """
+    with transaction.atomic():
+        Payment.objects.filter(mollie_payment_id=charge.id).exclude(status=charge.status).update(
+            status=charge.status)
+        if charge.is_paid():
+            Order.objects.filter(mollie_id=charge.id, paid=False).update(paid=True)
+
+
+def process_pending_notifications():
+    """Process every pending event, oldest first, and return the number processed.
+
+    The payment statuses are fetched in parallel; events whose status can't be fetched stay
+    pending, unless the error is permanent.
+    """
+    events = list(WebhookEvent.objects.filter(pending=True).order_by('received'))
+    if not events:
+        return 0
+    with _scheduled_lock:
+        _scheduled.difference_update(event.mollie_id for event in events)
+    charges = get_mollie_client().payments.get_many(
+        [event.mollie_id for event in events], max_workers=getattr(settings, 'MOLLIE_POOL_MAXSIZE', None))
+    for mollie_id, error in charges.errors.items():
+        logger.error('Could not fetch the status of payment %s: %s', mollie_id, error)
+    logger.info('Fetched the status of %d payments: %s', len(events), charges.stats())
+    for event, charge in zip(events, charges):
+        if not isinstance(charge, Error):
+            complete_event(event, charge)
+        elif is_permanent_error(charge):
+            fail_event(event, charge)
+    return len(charges.objects)
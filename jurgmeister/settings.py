@@ -64,6 +64,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'jurgmeister.urls'
 
+# Sessions, including the cart of anonymous visitors, live in the shared cache instead of the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -75,6 +78,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'cocktails.context_processors.cart',
             ],
         },
     },
@@ -97,6 +101,18 @@ DATABASES = {
     }    
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Shared by all gunicorn workers: the catalog version, the cached catalog pages and cart
+# counts must be the same in every process, so a per-process memory cache won't do.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://localhost:6379/1'),
+        'KEY_PREFIX': 'jurgmeister',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -161,6 +177,15 @@ AUTHENTICATION_BACKENDS = (
 SITE_ID = 1
 
 MOLLIE_SECRET_KEY = 'test_wxgbWFHcz9z7CMw7APmHNzJpQwsF5d'
+MOLLIE_POOL_MAXSIZE = 10
+MOLLIE_KEEP_ALIVE = 60
+MOLLIE_RETRIES = 3
+MOLLIE_RETRY_DEADLINE = 10
+MOLLIE_CIRCUIT_FAILURES = 5
+MOLLIE_CIRCUIT_RECOVERY = 30
+MOLLIE_WEBHOOK_WORKERS = 4
+MOLLIE_CONDITIONAL_CACHE_SIZE = 1024
+MOLLIE_RESPONSE_CACHE_TTLS = {'methods': 60 * 60, 'profile_methods': 60 * 60, 'profiles': 60 * 60}
 PAYMENTREDIRECTURL = 'https://jurgmeister.test2impress.be/cocktails/end/'
 WEBHOOKURL = 'https://jurgmeister.test2impress.be/cocktails/confirmation/'
 
@@ -0,0 +1,60 @@
+"""Compare the memory taken by ObjectList and CompactObjectList for pages of 250 payments.
+
+The peak is the memory used while the pages are created, including the decoded responses.
+
+Run with `python benchmarks/objects.py`.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+
+from mollie.api.client import Client
+from mollie.api.objects.list import CompactObjectList, ObjectList
+from mollie.api.objects.payment import Payment
+
+RESPONSES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "responses")
+PAGE_SIZE = 250
+PAGES = 20
+
+
+def make_page():
+    """Return the decoded result of a page of payments, like the API would send it."""
+    with open(os.path.join(RESPONSES_DIR, "payment_single.json"), "rb") as f:
+        payment = json.load(f)
+    payments = []
+    for number in range(PAGE_SIZE):
+        payment = dict(payment, id=f"tr_{number:010d}", description=f"Order {number}")
+        payments.append(json.loads(json.dumps(payment)))
+    return {"count": PAGE_SIZE, "_embedded": {"payments": payments}, "_links": {"next": None}}
+
+
+def benchmark(list_class, client):
+    tracemalloc.start()
+    pages = [list_class(make_page(), Payment, client) for _ in range(PAGES)]
+    memory, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    amounts = [payment.amount["value"] for page in pages for payment in page]
+    elapsed = time.perf_counter() - start
+    assert len(amounts) == PAGE_SIZE * PAGES
+    return memory, peak, elapsed
+
+
+def main():
+    client = Client()
+    print(f"{PAGES} pages of {PAGE_SIZE} payments, serializer: {client.serializer.name}")
+    baseline = None
+    for list_class in (ObjectList, CompactObjectList):
+        memory, peak, elapsed = benchmark(list_class, client)
+        baseline = baseline or memory
+        print(
+            f"{list_class.__name__:>17}: {memory / 2**20:6.1f} MiB ({memory / baseline:4.0%}), "
+            f"peak {peak / 2**20:6.1f} MiB, reading all payments takes {elapsed * 1e3:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
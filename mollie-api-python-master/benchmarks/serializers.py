@@ -0,0 +1,62 @@
+"""Compare the JSON serializers on the recorded API responses in tests/responses.
+
+Run with `python benchmarks/serializers.py`. Serializers that aren't installed are skipped.
+"""
+
+import json
+import os
+import timeit
+
+from mollie.api.serializers import JSONSerializer, OrjsonSerializer, UjsonSerializer, orjson, ujson
+
+RESPONSES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "responses")
+ROUNDS = 200
+
+
+def load_payloads():
+    payloads = []
+    for filename in sorted(os.listdir(RESPONSES_DIR)):
+        with open(os.path.join(RESPONSES_DIR, filename), "rb") as f:
+            content = f.read()
+        try:
+            payloads.append((content, json.loads(content)))
+        except ValueError:
+            pass
+    return payloads
+
+
+def benchmark(serializer, payloads):
+    def decode():
+        for content, _ in payloads:
+            serializer.loads(content)
+
+    def encode():
+        for _, data in payloads:
+            serializer.dumps(data)
+
+    decode_time = min(timeit.repeat(decode, number=ROUNDS, repeat=5)) / ROUNDS
+    encode_time = min(timeit.repeat(encode, number=ROUNDS, repeat=5)) / ROUNDS
+    return decode_time, encode_time
+
+
+def main():
+    payloads = load_payloads()
+    print(f"{len(payloads)} recorded responses, {sum(len(content) for content, _ in payloads)} bytes")
+    serializers = [JSONSerializer]
+    if orjson is not None:
+        serializers.append(OrjsonSerializer)
+    if ujson is not None:
+        serializers.append(UjsonSerializer)
+
+    baseline = None
+    for serializer in serializers:
+        decode_time, encode_time = benchmark(serializer, payloads)
+        baseline = baseline or (decode_time, encode_time)
+        print(
+            f"{serializer.name:>8}: decode {decode_time * 1e6:8.1f} us ({baseline[0] / decode_time:4.1f}x), "
+            f"encode {encode_time * 1e6:8.1f} us ({baseline[1] / encode_time:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import asyncio
+import inspect
+import time
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .client import Client
+from .error import RequestError, RequestSetupError
+from .retry import CONNECT_ERROR, READ_ERROR
+
+
+class AsyncClient(Client):
+    """Mollie API client for asyncio applications.
+
+    The AsyncClient offers the same resources as the Client, but every API call returns an awaitable:
+
+        payment = await client.payments.get("tr_12345")
+        payments = await client.payments.list()
+        more_payments = await payments.get_next()
+
+    All calls share a single pool of HTTP connections, which should be closed using `await client.aclose()`
+    or by using the client as an async context manager. OAuth authentication is not supported.
+    """
+
+    def __init__(
+        self,
+        api_endpoint=None,
+        timeout=(2, 10),
+        retry=3,
+        pool_maxsize=None,
+        response_cache=None,
+        conditional_cache=None,
+        circuit_breaker=None,
+        serializer=None,
+        transport=None,
+    ):
+        """Initialize a new asynchronous Mollie API client.
+
+        Accepts the same parameters as the Client, and additionally:
+
+        :param transport: An httpx transport to send the requests with, mostly useful for testing (httpx transport)
+        """
+        if httpx is None:
+            raise RequestSetupError(
+                "The AsyncClient requires httpx, install it using 'pip install mollie-api-python[async]'."
+            )
+        super().__init__(
+            api_endpoint=api_endpoint,
+            timeout=timeout,
+            retry=retry,
+            pool_maxsize=pool_maxsize,
+            response_cache=response_cache,
+            conditional_cache=conditional_cache,
+            circuit_breaker=circuit_breaker,
+            serializer=serializer,
+        )
+        self._transport = transport
+        self._async_client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close all connections in the pool."""
+        if self._async_client:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def setup_oauth(self, *args, **kwargs):
+        raise NotImplementedError("OAuth authentication is not supported by the AsyncClient.")
+
+    def _setup_async_client(self):
+        connect_timeout, read_timeout = self.timeout if isinstance(self.timeout, tuple) else (self.timeout,) * 2
+        transport = self._transport
+        if transport is None:
+            limits = httpx.Limits(
+                max_connections=self.pool_maxsize or 100, max_keepalive_connections=self.pool_maxsize or 20
+            )
+            transport = httpx.AsyncHTTPTransport(limits=limits)
+        self._async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            transport=transport,
+        )
+
+    async def perform_http_call(self, http_method, path, data=None, params=None, idempotency_key=None, headers=None):
+        if not self.api_key:
+            raise RequestSetupError("You have not set an API key. Please use set_api_key() to set the API key.")
+
+        if not self._async_client:
+            self._setup_async_client()
+
+        url, data, params = self._format_request_data(path, data, params)
+        headers = self._get_headers(idempotency_key, headers)
+        headers["Authorization"] = f"Bearer {self.api_key}"
+        if not self.circuit_breaker:
+            return await self._send_with_retries(http_method, url, headers, params, data)
+        # once per request: its retries are part of the same trial while the circuit is half-open
+        self.circuit_breaker.before_request()
+        try:
+            return await self._send_with_retries(http_method, url, headers, params, data)
+        except RequestError:
+            raise  # the outcome is already recorded
+        except (Exception, asyncio.CancelledError):
+            # record it, or a half-open circuit would never close again
+            self.circuit_breaker.record_failure()
+            raise
+
+    async def _send_with_retries(self, http_method, url, headers, params, data):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = await self._async_client.request(
+                    method=http_method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    content=data,
+                )
+            except httpx.HTTPError as err:
+                failure = CONNECT_ERROR if isinstance(err, (httpx.ConnectError, httpx.ConnectTimeout)) else READ_ERROR
+                delay = self._get_retry_delay(attempt, start, http_method, headers, failure)
+                if delay is None:
+                    raise RequestError(f"Unable to communicate with Mollie: {err}")
+            else:
+                retry_after = response.headers.get("Retry-After")
+                delay = self._get_retry_delay(attempt, start, http_method, headers, response.status_code, retry_after)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    async def process_response(response, *handlers):
+        if inspect.isawaitable(response):
+            response = await response
+        return Client.process_response(response, *handlers)
@@ -0,0 +1,57 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .error import Error
+
+DEFAULT_MAX_WORKERS = 10  # the default connection pool size of requests
+
+
+class BulkResult(list):
+    """The outcome of a bulk request: per id the object, or the error raised for it, in the order of the ids."""
+
+    def __init__(self, ids, outcomes, latencies):
+        super().__init__(outcomes)
+        self.ids = list(ids)
+        self.latencies = latencies
+
+    @property
+    def objects(self):
+        """Return the retrieved objects by id."""
+        return {id_: outcome for id_, outcome in zip(self.ids, self) if not isinstance(outcome, Error)}
+
+    @property
+    def errors(self):
+        """Return the errors by id."""
+        return {id_: outcome for id_, outcome in zip(self.ids, self) if isinstance(outcome, Error)}
+
+    def stats(self, percentiles=(50, 90, 99)):
+        """Return the number of errors and the latency percentiles of the requests, in seconds."""
+        latencies = sorted(self.latencies)
+        stats = {"requests": len(latencies), "errors": len(self.errors)}
+        for percentile in percentiles:
+            # nearest-rank percentile
+            rank = max(1, math.ceil(percentile / 100 * len(latencies)))
+            stats[f"p{percentile}"] = latencies[rank - 1] if latencies else None
+        return stats
+
+
+def fetch_many(fetch, ids, max_workers=None):
+    """Call `fetch(id)` for each id on a pool of threads and return a BulkResult.
+
+    Errors of the API client are returned in place of the object, any other exception is raised.
+    """
+    ids = list(ids)
+
+    def timed_fetch(id_):
+        start = time.monotonic()
+        try:
+            outcome = fetch(id_)
+        except Error as err:
+            outcome = err
+        return outcome, time.monotonic() - start
+
+    workers = max(1, min(len(ids), max_workers or DEFAULT_MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mollie-bulk") as executor:
+        timed = list(executor.map(timed_fetch, ids))
+    return BulkResult(ids, [outcome for outcome, _ in timed], [latency for _, latency in timed])
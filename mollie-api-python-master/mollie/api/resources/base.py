@@ -1,5 +1,10 @@
+import copy
+import functools
+
+from ..bulk import fetch_many
+from ..cache import request_digest
 from ..error import ResponseError, ResponseHandlingError
-from ..objects.list import ObjectList
+from ..objects.list import CompactObjectList, ObjectList
 
 
 class ResourceBase(object):
@@ -16,40 +21,112 @@ class ResourceBase(object):
     def get_resource_object(self, result):
         raise NotImplementedError()  # pragma: no cover
 
+    def _bind(self, **parent_ids):
+        """Return a copy of this resource, scoped to the given parent ids.
+
+        The shared resource on the client is never modified, so concurrent calls like
+        `client.shipments.on(order_a)` and `client.shipments.on(order_b)` can't interfere.
+        """
+        resource = copy.copy(self)
+        resource.__dict__.update(parent_ids)
+        return resource
+
     def get_resource_name(self):
         return self.__class__.__name__.lower()
 
-    def create(self, data=None, **params):
+    def get_object_list(self, result):
+        return ObjectList(result, self.get_resource_object({}).__class__, self.client)
+
+    def get_compact_object_list(self, result):
+        return CompactObjectList(result, self.get_resource_object({}).__class__, self.client)
+
+    def create(self, data=None, idempotency_key=None, **params):
         path = self.get_resource_name()
-        result = self.perform_api_call(self.REST_CREATE, path, data, params)
-        return self.get_resource_object(result)
+        return self.perform_api_call(
+            self.REST_CREATE, path, data, params, then=self.get_resource_object, idempotency_key=idempotency_key
+        )
 
     def get(self, resource_id, **params):
         path = self.get_resource_name() + "/" + str(resource_id)
-        result = self.perform_api_call(self.REST_READ, path, params=params)
-        return self.get_resource_object(result)
+        return self.perform_api_call(self.REST_READ, path, params=params, then=self.get_resource_object)
+
+    def get_many(self, resource_ids, max_workers=None, **params):
+        """Retrieve several objects in parallel, and return a BulkResult with the objects in the order of the ids.
+
+        The requests share the connection pool of the client; at most `max_workers` are in flight at once, which
+        defaults to the `pool_maxsize` of the client. An id that can't be retrieved, e.g. because it doesn't
+        exist, gets the error instead of its object. Not available with the AsyncClient.
+
+        :param max_workers: The maximum number of concurrent requests (integer)
+        """
+        return fetch_many(
+            lambda resource_id: self.get(resource_id, **params),
+            resource_ids,
+            max_workers or self.client.pool_maxsize,
+        )
 
     def update(self, resource_id, data=None, **params):
         path = self.get_resource_name() + "/" + str(resource_id)
-        result = self.perform_api_call(self.REST_UPDATE, path, data, params)
-        return self.get_resource_object(result)
+        return self.perform_api_call(self.REST_UPDATE, path, data, params, then=self.get_resource_object)
 
     def delete(self, resource_id, data=None):
         path = self.get_resource_name() + "/" + str(resource_id)
         return self.perform_api_call(self.REST_DELETE, path, data)
 
-    def list(self, **params):
+    def list(self, compact=False, **params):
+        """List the objects of this resource.
+
+        :param compact: Return a CompactObjectList, which takes less memory to keep large lists around (boolean)
+        """
         path = self.get_resource_name()
-        result = self.perform_api_call(self.REST_LIST, path, params=params)
-        return ObjectList(result, self.get_resource_object({}).__class__, self.client)
+        then = self.get_compact_object_list if compact else self.get_object_list
+        return self.perform_api_call(self.REST_LIST, path, params=params, then=then)
+
+    def iterate(self, **params):
+        """Return a generator over all objects of the list, retrieving the following sets as needed.
+
+        See `ObjectList.auto_paging_iter()`. Not available with the AsyncClient. Since at most two sets of
+        results are held at a time, a CompactObjectList wouldn't take less memory: `compact` isn't supported.
+        """
+        if "compact" in params:
+            raise TypeError("iterate() doesn't support compact, it only holds two sets of results at a time")
+        yield from self.list(**params).auto_paging_iter()
+
+    def perform_api_call(self, http_method, path, data=None, params=None, then=None, idempotency_key=None):
+        """Perform the API call and return the decoded result, or the result of `then(result)` when given.
+
+        With an AsyncClient, an awaitable is returned instead. When the client has a response cache that
+        covers this resource, GET requests are answered from the cache and other requests invalidate it.
+        With a conditional cache, GET requests are sent as conditional requests when possible.
+        """
+        cache = self.client.response_cache
+        ttl = cache.get_ttl(self) if cache is not None else None
+        update_cache = None
+        if ttl and http_method == self.REST_READ:
+            key = cache.make_key(self.client.api_key, path, params)
+            result = cache.get(key)
+            if result is not None:
+                return self.client.process_response(result, then)
+            update_cache = functools.partial(cache.set, key, ttl=ttl)
+        elif ttl:
+            update_cache = cache.invalidate
+        handle_response, headers = self.handle_response, None
+        conditional_cache = self.client.conditional_cache
+        if conditional_cache is not None and http_method == self.REST_READ:
+            key = request_digest(self.client.api_key, path, params)
+            headers, handle_response = conditional_cache.prepare(key, handle_response)
+        resp = self.client.perform_http_call(
+            http_method, path, data, params, idempotency_key=idempotency_key, headers=headers
+        )
+        return self.client.process_response(resp, handle_response, update_cache, then)
 
-    def perform_api_call(self, http_method, path, data=None, params=None):
-        resp = self.client.perform_http_call(http_method, path, data, params)
+    def handle_response(self, resp):
+        """Decode an API response, raising the appropriate error for error responses."""
         if "application/hal+json" in resp.headers.get("Content-Type", ""):
             # set the content type according to the media type definition
             resp.encoding = "utf-8"
         try:
-            result = resp.json() if resp.status_code != 204 else {}
+            result = self.client.serializer.loads(resp.content) if resp.status_code != 204 else {}
         except Exception:
             raise ResponseHandlingError(
                 f"Unable to decode Mollie API response (status code: {resp.status_code}): '{resp.text}'."
@@ -70,8 +147,7 @@ class ResourceBase(object):
 
         This method always does a GET request and returns a single Object.
         """
-        result = self.perform_api_call(self.REST_READ, url, data, params)
-        return self.get_resource_object(result)
+        return self.perform_api_call(self.REST_READ, url, data, params, then=self.get_resource_object)
 
     @staticmethod
     def extract_embed(params):
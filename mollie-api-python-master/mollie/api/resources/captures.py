@@ -21,8 +21,7 @@ class Captures(ResourceBase):
         return super().get(capture_id, **params)
 
     def with_parent_id(self, payment_id):
-        self.payment_id = payment_id
-        return self
+        return self._bind(payment_id=payment_id)
 
     def on(self, payment):
         return self.with_parent_id(payment.id)
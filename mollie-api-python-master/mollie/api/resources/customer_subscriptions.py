@@ -29,15 +29,14 @@ class CustomerSubscriptions(ResourceBase):
                 f"Invalid subscription ID: '{subscription_id}'. A subscription ID "
                 f"should start with '{self.RESOURCE_ID_PREFIX}'."
             )
-        result = super().delete(subscription_id, data)
-        return self.get_resource_object(result)
+        path = self.get_resource_name() + "/" + str(subscription_id)
+        return self.perform_api_call(self.REST_DELETE, path, data, then=self.get_resource_object)
 
     def get_resource_name(self):
         return f"customers/{self.customer_id}/subscriptions"
 
     def with_parent_id(self, customer_id):
-        self.customer_id = customer_id
-        return self
+        return self._bind(customer_id=customer_id)
 
     def on(self, customer):
         return self.with_parent_id(customer.id)
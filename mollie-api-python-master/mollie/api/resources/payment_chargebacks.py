@@ -8,8 +8,7 @@ class PaymentChargebacks(Chargebacks):
         return f"payments/{self.payment_id}/chargebacks"
 
     def with_parent_id(self, payment_id):
-        self.payment_id = payment_id
-        return self
+        return self._bind(payment_id=payment_id)
 
     def on(self, payment):
         return self.with_parent_id(payment.id)
@@ -26,5 +26,5 @@ class Payments(ResourceBase):
             raise IdentifierError(
                 f"Invalid payment ID: '{payment_id}'. A payment ID should start with '{self.RESOURCE_ID_PREFIX}'."
             )
-        result = super().delete(payment_id, data)
-        return self.get_resource_object(result)
+        path = self.get_resource_name() + "/" + str(payment_id)
+        return self.perform_api_call(self.REST_DELETE, path, data, then=self.get_resource_object)
@@ -21,22 +21,17 @@ class ProfileMethods(Methods):
     def delete(self, resource_id=None, *args, **kwargs):
         if self.method_id in self.RESOURCE_REQUIRED_METHODS and resource_id is None:
             raise RequestError(f"resource_id is required when disabling a {self.method_id}.")
-        self.resource_id = resource_id
-        path = self.get_resource_name()
+        path = self._bind(resource_id=resource_id).get_resource_name()
         return self.perform_api_call(self.REST_DELETE, path, None)
 
     def create(self, resource_id=None, data=None, **params):
         if self.method_id in self.RESOURCE_REQUIRED_METHODS and resource_id is None:
             raise RequestError(f"resource_id is required when enabling a {self.method_id}.")
-        self.resource_id = resource_id
-        path = self.get_resource_name()
-        result = self.perform_api_call(self.REST_CREATE, path, data=data, params=params)
-        return self.get_resource_object(result)
+        path = self._bind(resource_id=resource_id).get_resource_name()
+        return self.perform_api_call(self.REST_CREATE, path, data=data, params=params, then=self.get_resource_object)
 
     def with_parent_id(self, profile_id, method=None):
-        self.method_id = method
-        self.profile_id = profile_id
-        return self
+        return self._bind(method_id=method, profile_id=profile_id)
 
     def on(self, profile, method=None):
         return self.with_parent_id(profile.id, method)
@@ -8,8 +8,7 @@ class SettlementChargebacks(Chargebacks):
         return f"settlements/{self.settlement_id}/chargebacks"
 
     def with_parent_id(self, settlement_id):
-        self.settlement_id = settlement_id
-        return self
+        return self._bind(settlement_id=settlement_id)
 
     def on(self, settlement):
         return self.with_parent_id(settlement.id)
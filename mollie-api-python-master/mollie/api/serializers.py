@@ -0,0 +1,63 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JSONSerializer(object):
+    """Encode request data and decode responses with the json module of the standard library."""
+
+    name = "json"
+
+    @staticmethod
+    def dumps(data):
+        return json.dumps(data)
+
+    @staticmethod
+    def loads(content):
+        return json.loads(content)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """Encode and decode using orjson, which works on bytes directly and is several times faster."""
+
+    name = "orjson"
+
+    @staticmethod
+    def dumps(data):
+        # like the json module, refuse to encode datetimes instead of picking a format for them
+        return orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+    @staticmethod
+    def loads(content):
+        return orjson.loads(content)
+
+
+class UjsonSerializer(JSONSerializer):
+    """Encode and decode using ujson."""
+
+    name = "ujson"
+
+    @staticmethod
+    def dumps(data):
+        return ujson.dumps(data, escape_forward_slashes=False)
+
+    @staticmethod
+    def loads(content):
+        return ujson.loads(content)
+
+
+def get_default_serializer():
+    """Return the fastest serializer that is installed: orjson, ujson or the json module."""
+    if orjson is not None:
+        return OrjsonSerializer()
+    if ujson is not None:
+        return UjsonSerializer()
+    return JSONSerializer()
@@ -79,6 +79,10 @@ setup(
         "urllib3",
         "requests_oauthlib",
     ],
+    extras_require={
+        "async": ["httpx"],
+        "speedups": ["orjson"],
+    },
     classifiers=[
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from mollie.api.cache import ResponseCache
+from mollie.api.error import NotFoundError, RequestSetupError
+from mollie.api.objects.customer import Customer
+from mollie.api.objects.list import ObjectList
+from mollie.api.objects.order import Order
+from mollie.api.objects.payment import Payment
+
+httpx = pytest.importorskip("httpx")
+
+from mollie.api.async_client import AsyncClient  # noqa: E402
+
+PAYMENT_ID = "tr_7UhSN1zuXS"
+ORDER_ID = "ord_kEn1PlbGa"
+
+
+def read_response(filename):
+    file = os.path.join(os.path.dirname(__file__), "responses", f"{filename}.json")
+    with open(file, encoding="utf-8") as f:
+        return f.read()
+
+
+class FakeApi:
+    """An httpx transport handler serving the recorded responses by method and URL."""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+
+    def add(self, method, url, filename, status=200):
+        self.routes[(method, url)] = (filename, status)
+
+    def __call__(self, request):
+        self.requests.append(request)
+        try:
+            filename, status = self.routes[(request.method, str(request.url))]
+        except KeyError:
+            filename, status = "customer_doesnotexist", 404
+        headers = {"Content-Type": "application/hal+json"}
+        return httpx.Response(status, content=read_response(filename).encode(), headers=headers)
+
+
+@pytest.fixture
+def api():
+    return FakeApi()
+
+
+@pytest.fixture
+def async_client(api):
+    client = AsyncClient(transport=httpx.MockTransport(api))
+    client.set_api_key("test_test")
+    return client
+
+
+def test_async_client_create_payment(async_client, api):
+    api.add("POST", "https://api.mollie.com/v2/payments", "payment_single", 201)
+
+    async def create():
+        async with async_client:
+            return await async_client.payments.create({"amount": {"currency": "EUR", "value": "10.00"}})
+
+    payment = asyncio.run(create())
+    assert isinstance(payment, Payment)
+    assert payment.id == PAYMENT_ID
+    assert json.loads(api.requests[0].content) == {"amount": {"currency": "EUR", "value": "10.00"}}
+    assert api.requests[0].headers["Authorization"] == "Bearer test_test"
+
+
+def test_async_client_get_order_with_embed(async_client, api):
+    api.add("GET", f"https://api.mollie.com/v2/orders/{ORDER_ID}?embed=payments", "order_single")
+
+    order = asyncio.run(async_client.orders.get(ORDER_ID, embed="payments"))
+    assert isinstance(order, Order)
+    assert order.requested_embeds == ["payments"]
+
+
+def test_async_client_list_pagination(async_client, api):
+    api.add("GET", "https://api.mollie.com/v2/customers?limit=5", "customers_list_first")
+    api.add("GET", "https://api.mollie.com/v2/customers?from=cst_8pknKQJzJa&limit=5", "customers_list_second")
+    api.add("GET", "https://api.mollie.com/v2/customers?from=cst_prs8JjDf57&limit=5", "customers_list_third")
+    api.add("GET", "https://api.mollie.com/v2/customers?from=cst_g328m9rhGe&limit=5", "customers_list_fourth")
+
+    async def list_all():
+        customers = await async_client.customers.list(limit=5)
+        ids = [customer.id for customer in customers]
+        while customers.has_next():
+            customers = await customers.get_next()
+            assert isinstance(customers, ObjectList)
+            ids.extend(customer.id for customer in customers)
+        return ids
+
+    ids = asyncio.run(list_all())
+    assert len(ids) == 17
+    assert len(set(ids)) == 17
+
+
+def test_async_client_concurrent_requests(async_client, api):
+    api.add("GET", "https://api.mollie.com/v2/customers/cst_8wmqcHMN4U", "customer_single")
+
+    async def fetch_many():
+        async with async_client:
+            return await asyncio.gather(*[async_client.customers.get("cst_8wmqcHMN4U") for _ in range(100)])
+
+    customers = asyncio.run(fetch_many())
+    assert len(customers) == 100
+    assert all(isinstance(customer, Customer) for customer in customers)
+
+
+def test_async_client_error_response(async_client):
+    with pytest.raises(NotFoundError):
+        asyncio.run(async_client.customers.get("cst_doesnotexist"))
+
+
+def test_async_client_no_api_key():
+    client = AsyncClient()
+    with pytest.raises(RequestSetupError, match="You have not set an API key."):
+        asyncio.run(client.payments.list())
+
+
+def test_async_client_does_not_support_oauth():
+    with pytest.raises(NotImplementedError):
+        AsyncClient().setup_oauth("client_id", "client_secret", "https://example.com", [], None, None)
+
+
+def test_async_client_response_cache(api):
+    api.add("GET", "https://api.mollie.com/v2/methods", "methods_list")
+    client = AsyncClient(response_cache=ResponseCache(), transport=httpx.MockTransport(api))
+    client.set_api_key("test_test")
+
+    async def list_twice():
+        async with client:
+            return [await client.methods.list(), await client.methods.list()]
+
+    first, second = asyncio.run(list_twice())
+    assert isinstance(second, ObjectList)
+    assert second.count == first.count
+    assert len(api.requests) == 1
+
+
+def test_async_client_retries(api, mocker):
+    sleep = mocker.patch("mollie.api.async_client.asyncio.sleep")
+    unavailable = iter([httpx.Response(503, json={"status": 503, "title": "Unavailable", "detail": "Try again."})])
+
+    def handler(request):
+        return next(unavailable, None) or api(request)
+
+    api.add("GET", f"https://api.mollie.com/v2/payments/{PAYMENT_ID}", "payment_single")
+    client = AsyncClient(transport=httpx.MockTransport(handler))
+    client.set_api_key("test_test")
+
+    payment = asyncio.run(client.payments.get(PAYMENT_ID))
+    assert payment.id == PAYMENT_ID
+    assert sleep.call_count == 1
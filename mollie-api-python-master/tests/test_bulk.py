@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from mollie.api.bulk import BulkResult, fetch_many
+from mollie.api.error import IdentifierError, NotFoundError
+from mollie.api.objects.customer import Customer
+from mollie.api.objects.payment import Payment
+
+PAYMENT_ID = "tr_7UhSN1zuXS"
+
+
+def test_get_many_preserves_order(client, response):
+    response.get("https://api.mollie.com/v2/customers/cst_8wmqcHMN4U", "customer_single")
+    response.get("https://api.mollie.com/v2/customers/cst_doesnotexist", "customer_doesnotexist", 404)
+
+    customers = client.customers.get_many(["cst_doesnotexist", "cst_8wmqcHMN4U", "cst_8wmqcHMN4U"])
+    assert isinstance(customers, BulkResult)
+    assert isinstance(customers[0], NotFoundError)
+    assert isinstance(customers[1], Customer) and customers[1].id == "cst_8wmqcHMN4U"
+    assert isinstance(customers[2], Customer)
+    assert list(customers.errors) == ["cst_doesnotexist"]
+    assert list(customers.objects) == ["cst_8wmqcHMN4U"]
+
+
+def test_get_many_validates_ids(client, response):
+    response.get(f"https://api.mollie.com/v2/payments/{PAYMENT_ID}", "payment_single")
+
+    payments = client.payments.get_many([PAYMENT_ID, "invalid"])
+    assert isinstance(payments[0], Payment)
+    assert isinstance(payments[1], IdentifierError)
+    assert len(response.calls) == 1
+
+
+def test_fetch_many_runs_concurrently():
+    barrier = threading.Barrier(4, timeout=5)
+
+    def fetch(id_):
+        barrier.wait()
+        return id_ * 2
+
+    result = fetch_many(fetch, [1, 2, 3, 4], max_workers=4)
+    assert result == [2, 4, 6, 8]
+    assert len(result.latencies) == 4
+
+
+def test_fetch_many_raises_unexpected_errors():
+    def fetch(id_):
+        raise ValueError(id_)
+
+    with pytest.raises(ValueError):
+        fetch_many(fetch, [1])
+
+
+def test_bulk_result_stats():
+    result = BulkResult(["a", "b", "c", "d"], [1, 2, 3, IdentifierError()], [0.4, 0.1, 0.3, 0.2])
+    assert result.stats() == {"requests": 4, "errors": 1, "p50": 0.2, "p90": 0.4, "p99": 0.4}
+    assert BulkResult([], [], []).stats(percentiles=(50,)) == {"requests": 0, "errors": 0, "p50": None}
@@ -0,0 +1,179 @@
+import os
+
+import pytest
+import responses
+
+from mollie.api.cache import ConditionalCache, MemoryCache, ResponseCache
+from mollie.api.client import Client
+from mollie.api.objects.list import ObjectList
+from mollie.api.objects.method import Method
+from mollie.api.objects.payment import Payment
+from mollie.api.objects.profile import Profile
+
+PROFILE_ID = "pfl_v9hTwCvYqw"
+
+
+@pytest.fixture
+def response_cache():
+    return ResponseCache()
+
+
+@pytest.fixture
+def cached_client(response_cache):
+    """A client with a response cache of its own, since the client fixture is shared between tests."""
+    client = Client(response_cache=response_cache)
+    client.set_api_key("test_test")
+    return client
+
+
+def test_cached_get_requests(cached_client, response_cache, response):
+    """Repeated GET requests for cached resources should be answered from the cache."""
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+    response.get(f"https://api.mollie.com/v2/profiles/{PROFILE_ID}", "profile_single")
+
+    for _ in range(3):
+        methods = cached_client.methods.list()
+        assert isinstance(methods, ObjectList)
+        assert isinstance(methods[0], Method)
+        profile = cached_client.profiles.get(PROFILE_ID)
+        assert isinstance(profile, Profile)
+
+    assert len(response.calls) == 2
+    assert response_cache.stats() == {"hits": 4, "misses": 2, "hit_rate": 4 / 6}
+
+
+def test_cache_is_keyed_by_params_and_api_key(cached_client, response_cache, response):
+    response.get("https://api.mollie.com/v2/methods?locale=nl_NL", "methods_list")
+    response.get("https://api.mollie.com/v2/methods?locale=en_US", "methods_list")
+    response.get("https://api.mollie.com/v2/methods?locale=nl_NL", "methods_list")
+
+    cached_client.methods.list(locale="nl_NL")
+    cached_client.methods.list(locale="en_US")
+    cached_client.methods.list(locale="nl_NL")
+    assert len(response.calls) == 2
+
+    other_client = Client(response_cache=response_cache)
+    other_client.set_api_key("test_other")
+    other_client.methods.list(locale="nl_NL")
+    assert len(response.calls) == 3
+
+
+def test_uncached_resources(cached_client, response):
+    """Resources that aren't allow-listed should always be requested."""
+    response.get("https://api.mollie.com/v2/payments/tr_7UhSN1zuXS", "payment_single")
+
+    cached_client.payments.get("tr_7UhSN1zuXS")
+    cached_client.payments.get("tr_7UhSN1zuXS")
+    assert len(response.calls) == 2
+
+
+def test_cache_expires(cached_client, response, mocker):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+    monotonic = mocker.patch("mollie.api.cache.time.monotonic", return_value=1000)
+
+    cached_client.methods.list()
+    monotonic.return_value = 1000 + ResponseCache.DEFAULT_TTLS["methods"] - 1
+    cached_client.methods.list()
+    assert len(response.calls) == 1
+
+    monotonic.return_value = 1000 + ResponseCache.DEFAULT_TTLS["methods"]
+    cached_client.methods.list()
+    assert len(response.calls) == 2
+
+
+def test_write_invalidates_the_cache(cached_client, response):
+    """Enabling a payment method on a profile should drop the cached methods."""
+    response.get(f"https://api.mollie.com/v2/methods?profileId={PROFILE_ID}", "methods_list")
+    response.post(
+        f"https://api.mollie.com/v2/profiles/{PROFILE_ID}/methods/bancontact", "profile_enable_payment_method"
+    )
+
+    cached_client.profile_methods.with_parent_id(PROFILE_ID).list()
+    cached_client.profile_methods.with_parent_id(PROFILE_ID, "bancontact").create()
+    cached_client.profile_methods.with_parent_id(PROFILE_ID).list()
+    assert len(response.calls) == 3
+
+
+def test_memory_cache_is_bounded():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    assert cache.get("a") == 1
+    cache.set("c", 3, 60)
+    assert cache.get("b") is None, "The least recently used entry should be evicted"
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_custom_backend(response):
+    """Any object with get() and set(key, value, timeout) can store the responses."""
+
+    class DictBackend(dict):
+        def set(self, key, value, timeout):
+            self[key] = value
+
+    backend = DictBackend()
+    client = Client(response_cache=ResponseCache(ttls={"methods": 60}, backend=backend))
+    client.set_api_key("test_test")
+    response.get("https://api.mollie.com/v2/methods/all", "methods_list")
+
+    client.methods.all()
+    client.methods.all()
+    assert len(response.calls) == 1
+    assert len(backend) == 1
+
+
+def read_response(filename):
+    file = os.path.join(os.path.dirname(__file__), "responses", f"{filename}.json")
+    with open(file, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def conditional_client():
+    client = Client(conditional_cache=ConditionalCache())
+    client.set_api_key("test_test")
+    return client
+
+
+def test_conditional_requests(conditional_client, response):
+    """A repeated GET should send the ETag, and use the stored result when the API answers 304."""
+    url = "https://api.mollie.com/v2/payments/tr_7UhSN1zuXS"
+    body = read_response("payment_single")
+    response.add(responses.GET, url, body=body, content_type="application/hal+json", headers={"ETag": '"v1"'})
+    response.add(responses.GET, url, status=304, headers={"ETag": '"v1"'})
+    response.add(responses.GET, url, body=body, content_type="application/hal+json", headers={"ETag": '"v2"'})
+    response.add(responses.GET, url, status=304, headers={"ETag": '"v2"'})
+
+    payments = [conditional_client.payments.get("tr_7UhSN1zuXS") for _ in range(4)]
+
+    assert all(isinstance(payment, Payment) and payment.id == "tr_7UhSN1zuXS" for payment in payments)
+    sent = [call.request.headers.get("If-None-Match") for call in response.calls]
+    assert sent == [None, '"v1"', '"v1"', '"v2"']
+    assert conditional_client.conditional_cache.stats() == {"not_modified": 2, "modified": 2}
+
+
+def test_conditional_requests_last_modified(conditional_client, response):
+    url = "https://api.mollie.com/v2/payments/tr_7UhSN1zuXS"
+    last_modified = "Sun, 18 Oct 2026 12:00:00 GMT"
+    body = read_response("payment_single")
+    response.add(
+        responses.GET, url, body=body, content_type="application/hal+json", headers={"Last-Modified": last_modified}
+    )
+    response.add(responses.GET, url, status=304)
+
+    conditional_client.payments.get("tr_7UhSN1zuXS")
+    payment = conditional_client.payments.get("tr_7UhSN1zuXS")
+    assert payment.id == "tr_7UhSN1zuXS"
+    assert response.calls[1].request.headers["If-Modified-Since"] == last_modified
+    assert "If-None-Match" not in response.calls[1].request.headers
+
+
+def test_conditional_requests_only_for_get(conditional_client, response):
+    """Responses without validators aren't stored, and only GET requests are conditional."""
+    response.get("https://api.mollie.com/v2/payments/tr_7UhSN1zuXS", "payment_single")
+    response.patch("https://api.mollie.com/v2/payments/tr_7UhSN1zuXS", "payment_single")
+
+    conditional_client.payments.get("tr_7UhSN1zuXS")
+    conditional_client.payments.get("tr_7UhSN1zuXS")
+    conditional_client.payments.update("tr_7UhSN1zuXS", {"description": "Order 1"})
+    assert all("If-None-Match" not in call.request.headers for call in response.calls)
@@ -1,5 +1,10 @@
+import json
 import re
+import subprocess
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import pytest
@@ -19,6 +24,8 @@ from mollie.api.error import (
 )
 from mollie.api.objects.method import Method
 from mollie.api.objects.organization import Organization
+from mollie.api.resources.payments import Payments
+from mollie.api.retry import RetryPolicy
 
 from .utils import assert_list_object
 
@@ -109,11 +116,12 @@ def test_client_broken_cert_bundle(monkeypatch):
     assert "Could not find a suitable TLS CA certificate bundle, invalid path: /does/not/exist" in str(excinfo.value)
 
 
-def test_client_generic_request_error(response, oauth_client):
+def test_client_generic_request_error(response, oauth_client, mocker):
     """When the remote server refuses connections or other request issues arise, an error should be raised.
 
     The 'response' fixture blocks all outgoing connections, also when no actual responses are configured.
     """
+    mocker.patch("mollie.api.client.time.sleep")
     client = Client()
     client.set_api_key("test_test")
     client.set_api_endpoint("https://api.mollie.invalid/")
@@ -293,7 +301,7 @@ def test_client_request_timeout(mocker, client):
     # Create a mocked response for the request
     response = mocker.Mock(status_code=200)
     response.headers.get.return_value = "application/hal+json"
-    response.json.return_value = {}
+    response.content = b"{}"
     mocked_request.return_value = response
 
     client.set_timeout(300)
@@ -303,6 +311,7 @@ def test_client_request_timeout(mocker, client):
 
 def test_client_request_timed_out(mocker, client):
     """Timeout should raise a RequestError."""
+    mocker.patch("mollie.api.client.time.sleep")
     mocker.patch(
         "mollie.api.client.requests.Session.request",
         side_effect=requests.exceptions.ReadTimeout(
@@ -321,8 +330,23 @@ def test_client_will_propagate_retry_setting(response):
     client.set_api_key("test_test")
     client.methods.list()
 
+    assert isinstance(client.retry_policy, RetryPolicy)
+    assert client.retry_policy.retries == 3
+    policy = RetryPolicy(retries=5, deadline=2)
+    assert Client(retry=policy).retry_policy is policy
+
+
+def test_client_will_propagate_pool_maxsize_setting(response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    client = Client(retry=0, pool_maxsize=25)
+    client.set_api_key("test_test")
+    client.methods.list()
+
     adapter = client._client.adapters["https://"]
-    assert adapter.max_retries.connect == 3
+    assert adapter._pool_maxsize == 25
+    assert adapter.max_retries.total == 0, "Retries are done by the client, not by the HTTP adapter"
+    assert client.retry_policy.retries == 0
 
 
 def test_client_data_consistency_error(client, response):
@@ -343,7 +367,7 @@ def test_client_data_consistency_error(client, response):
 
 def test_client_default_user_agent(client, response):
     """Default user-agent should contain some known values."""
-    regex = re.compile(r"^Mollie/[\d\.]+ Python/[\w\.\+]+ OpenSSL/[\w\.]+$")
+    regex = re.compile(r"^Mollie/[\w\.\+]+ Python/[\w\.\+]+ OpenSSL/[\w\.]+$")
     assert re.match(regex, client.user_agent)
 
     # perform a request and inpect the actual used headers
@@ -353,9 +377,25 @@ def test_client_default_user_agent(client, response):
     assert re.match(regex, request.headers["User-Agent"])
 
 
+def test_client_idempotency_key(client, response):
+    """An idempotency key should be sent as a header, and only when given."""
+    response.post("https://api.mollie.com/v2/payments", "payment_single")
+    client.payments.create({"amount": {"currency": "EUR", "value": "10.00"}}, idempotency_key="order-1")
+    client.payments.create({"amount": {"currency": "EUR", "value": "10.00"}})
+    assert response.calls[0].request.headers["Idempotency-Key"] == "order-1"
+    assert "Idempotency-Key" not in response.calls[1].request.headers
+    assert "idempotency" not in response.calls[0].request.url
+
+
+def test_oauth_client_idempotency_key(oauth_client, response):
+    response.post("https://api.mollie.com/v2/payments", "payment_single")
+    oauth_client.payments.create({"amount": {"currency": "EUR", "value": "10.00"}}, idempotency_key="order-1")
+    assert response.calls[0].request.headers["Idempotency-Key"] == "order-1"
+
+
 def test_oauth_client_default_user_agent(oauth_client, response):
     """Default user-agent should contain some known values."""
-    regex = re.compile(r"^Mollie/[\d\.]+ Python/[\w\.\+]+ OpenSSL/[\w\.]+ OAuth/2.0$")
+    regex = re.compile(r"^Mollie/[\w\.\+]+ Python/[\w\.\+]+ OpenSSL/[\w\.]+ OAuth/2.0$")
     assert re.match(regex, oauth_client.user_agent)
 
     # perform a request and inpect the actual used headers
@@ -493,3 +533,69 @@ def test_unauthorized_oauth_client_should_return_authorization_url(mocker, respo
     assert authorization_url.startswith(
         client.OAUTH_AUTHORIZATION_URL
     ), "A client without initial token should return a correct authorization url"
+
+
+def test_client_resources_are_created_lazily():
+    """Resources are only created on first access, and reused afterwards."""
+    client = Client()
+    assert "payments" not in vars(client)
+
+    payments = client.payments
+    assert isinstance(payments, Payments)
+    assert payments.client is client
+    assert client.payments is payments
+    assert "orders" not in vars(client)
+
+
+def test_client_unknown_attribute():
+    client = Client()
+    with pytest.raises(AttributeError, match="'Client' object has no attribute 'hoeba'"):
+        client.hoeba
+
+
+def test_client_import_does_not_import_resources():
+    """Importing the client should not import any of the resource modules."""
+    code = (
+        "import sys; import mollie.api.client; "
+        "print(sorted(m for m in sys.modules if m.startswith('mollie.api.resources.')))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_client_parent_scoped_resources_are_not_shared():
+    """Binding a resource to a parent returns a new resource, the shared one is left untouched."""
+    client = Client()
+    shipments_a = client.shipments.with_parent_id("ord_a")
+    shipments_b = client.shipments.with_parent_id("ord_b")
+
+    assert shipments_a is not client.shipments
+    assert shipments_a.get_resource_name() == "orders/ord_a/shipments"
+    assert shipments_b.get_resource_name() == "orders/ord_b/shipments"
+    assert client.shipments.order_id is None
+
+
+def test_client_parent_scoped_resources_under_concurrency(client, response):
+    """Many threads sharing one client each hit the URL of their own parent."""
+    response.add_callback(
+        response.GET,
+        re.compile(r"https://api.mollie.com/v2/orders/\w+/shipments"),
+        callback=lambda request: (
+            200,
+            {"Content-Type": "application/hal+json"},
+            json.dumps({"_embedded": {"shipments": []}, "count": 0, "_links": {"self": {"href": request.url}}}),
+        ),
+    )
+    threads = 32
+    barrier = threading.Barrier(threads)
+
+    def list_shipments(number):
+        shipments = client.shipments.with_parent_id(f"ord_{number}")
+        barrier.wait()
+        return [shipments.list()["_links"]["self"]["href"] for _ in range(10)]
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(list_shipments, range(threads)))
+
+    for number, urls in enumerate(results):
+        assert urls == [f"https://api.mollie.com/v2/orders/ord_{number}/shipments"] * 10
@@ -1,6 +1,7 @@
 import pytest
 
-from mollie.api.objects.list import ObjectList
+from mollie.api.objects.customer import Customer
+from mollie.api.objects.list import CompactObjectList, ObjectList
 from mollie.api.objects.method import Method
 
 from .utils import assert_list_object
@@ -158,3 +159,131 @@ def test_list_supports_slice_sequences(client, response):
     slice_step_only = methods[::3]
     assert_list_object(slice_step_only, Method, 4), "Slicing with only a step value should be possible"
     assert [x.id for x in slice_step_only] == ["ideal", "bancontact", "kbc", "giftcard"]
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_list_auto_paging_iter(client, response, prefetch):
+    """Verify that the auto paging iterator walks all sets of a paginated result set."""
+    response.get("https://api.mollie.com/v2/customers?limit=5", "customers_list_first")
+    response.get("https://api.mollie.com/v2/customers?from=cst_8pknKQJzJa&limit=5", "customers_list_second")
+    response.get("https://api.mollie.com/v2/customers?from=cst_prs8JjDf57&limit=5", "customers_list_third")
+    response.get("https://api.mollie.com/v2/customers?from=cst_g328m9rhGe&limit=5", "customers_list_fourth")
+
+    customers = client.customers.list(limit=5)
+    customer_ids = [customer.id for customer in customers.auto_paging_iter(prefetch=prefetch)]
+
+    assert len(customer_ids) == 17, "Unexpected number of customers"
+    assert len(set(customer_ids)) == 17, "Unexpected number of unique customers"
+    assert len(response.calls) == 4
+    assert customers.count == 5, "The first set should not be modified"
+
+
+def test_list_auto_paging_iter_is_lazy(client, response):
+    """Verify that sets are only retrieved when the iteration gets near them."""
+    response.get("https://api.mollie.com/v2/customers?limit=5", "customers_list_first")
+    response.get("https://api.mollie.com/v2/customers?from=cst_8pknKQJzJa&limit=5", "customers_list_second")
+
+    iterator = client.customers.iterate(limit=5)
+    assert len(response.calls) == 0, "No API call should be done before iterating"
+    first_set_ids = [next(iterator).id for _ in range(5)]
+    iterator.close()
+
+    assert len(set(first_set_ids)) == 5
+    assert [call.request.url for call in response.calls] == [
+        "https://api.mollie.com/v2/customers?limit=5",
+        "https://api.mollie.com/v2/customers?from=cst_8pknKQJzJa&limit=5",
+    ], "Only the set following the current set should be prefetched"
+
+
+def test_list_auto_paging_iter_single_set(client, response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    methods = list(client.methods.iterate())
+    assert len(methods) == 10
+    assert all(isinstance(method, Method) for method in methods)
+
+
+def test_compact_list_behaves_like_list(client, response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    methods = client.methods.list()
+    compact = client.methods.list(compact=True)
+    assert isinstance(compact, CompactObjectList)
+    assert len(compact) == len(methods) == 10
+    assert [method.id for method in compact] == [method.id for method in methods]
+    assert compact[3] == methods[3]
+    assert isinstance(compact[-1], Method)
+    assert_list_object(compact[2:5], Method, 3)
+    assert response.calls[1].request.url == "https://api.mollie.com/v2/methods", "compact shouldn't be sent"
+
+
+def test_compact_list_pagination(client, response):
+    response.get("https://api.mollie.com/v2/customers?limit=5", "customers_list_first")
+    response.get("https://api.mollie.com/v2/customers?from=cst_8pknKQJzJa&limit=5", "customers_list_second")
+    response.get("https://api.mollie.com/v2/customers?from=cst_prs8JjDf57&limit=5", "customers_list_third")
+    response.get("https://api.mollie.com/v2/customers?from=cst_g328m9rhGe&limit=5", "customers_list_fourth")
+
+    customers = client.customers.list(limit=5, compact=True)
+    assert isinstance(customers.get_next(), CompactObjectList)
+    all_customers = list(customers.auto_paging_iter(prefetch=False))
+    assert len(all_customers) == 17
+    assert all(isinstance(customer, Customer) for customer in all_customers)
+
+
+def test_iterate_doesnt_support_compact(client):
+    with pytest.raises(TypeError, match="compact"):
+        next(client.customers.iterate(limit=5, compact=True))
+
+
+def test_compact_list_stores_encoded_items(client, response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    compact = client.methods.list(compact=True)
+    encoded = compact["_embedded"]["methods"]._encoded
+    assert all(isinstance(item, (bytes, str)) for item in encoded)
+    assert next(compact)["resource"] == "method"
+
+
+def test_list_returns_the_same_object_per_index(client, response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    methods = client.methods.list()
+    assert methods[3] is methods[3]
+    assert methods[-1] is methods[9]
+    assert [method for method in methods][3] is methods[3]
+
+
+def test_list_slices_share_items(client, response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    methods = client.methods.list()
+    sliced = methods[2:8][1::2]
+    assert [method.id for method in sliced] == ["bancontact", "sofort", "belfius"]
+    assert sliced["_embedded"]["methods"]._items is methods["_embedded"]["methods"]
+    assert [method.id for method in methods[-2:]] == ["inghomepay", "giftcard"]
+    assert methods[20:].count == 0
+
+    with pytest.raises(IndexError, match="list index out of range"):
+        sliced[3]
+
+
+def test_list_nested_iteration(client, response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    methods = client.methods.list()
+    assert next(methods).id == "ideal"
+    pairs = [(outer.id, inner.id) for outer in methods for inner in methods]
+    assert len(pairs) == 100
+    assert next(methods).id == "creditcard", "Looping over the list shouldn't move its own cursor"
+
+
+def test_compact_list_slices_stay_encoded(client, response):
+    response.get("https://api.mollie.com/v2/methods", "methods_list")
+
+    compact = client.methods.list(compact=True)
+    sliced = compact[1:3]
+    assert isinstance(sliced, CompactObjectList)
+    assert sliced["_embedded"]["methods"]._items is compact["_embedded"]["methods"]
+    assert [method.id for method in sliced] == ["creditcard", "paypal"]
+    assert compact[0] is not compact[0], "Decoded objects shouldn't be kept"
@@ -0,0 +1,237 @@
+import json
+import socket
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mollie.api.client import Client
+from mollie.api.error import CircuitOpenError, RequestError, ResponseError
+from mollie.api.retry import CONNECT_ERROR, READ_ERROR, CircuitBreaker, RetryPolicy, parse_retry_after
+
+PAYMENT = {"resource": "payment", "id": "tr_7UhSN1zuXS", "status": "open"}
+UNAVAILABLE = {"status": 503, "title": "Service Unavailable", "detail": "The service is temporarily unavailable."}
+# mocking the sleep of the client replaces time.sleep everywhere, keep the real one for the server and the tests
+real_sleep = time.sleep
+
+TOO_MANY_REQUESTS = {"status": 429, "title": "Too Many Requests", "detail": "Slow down."}
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """Answers each request with the next scripted reply of the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.server.requests.append((self.command, self.headers.get("Idempotency-Key")))
+        status, body, headers = self.server.replies.pop(0) if self.server.replies else (200, PAYMENT, {})
+        if status == "timeout":
+            real_sleep(body)
+            status, body = 200, PAYMENT
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/hal+json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up waiting
+
+    do_GET = do_POST = do_DELETE = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeApiHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.replies = []
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(mocker):
+    """Record the backoff delays instead of waiting."""
+    delays = []
+    mocker.patch("mollie.api.client.time.sleep", side_effect=delays.append)
+    return delays
+
+
+def make_client(server_or_port, **kwargs):
+    port = server_or_port if isinstance(server_or_port, int) else server_or_port.server_port
+    kwargs.setdefault("retry", RetryPolicy(retries=3, backoff_factor=0.1))
+    client = Client(api_endpoint=f"http://127.0.0.1:{port}", timeout=(1, 0.5), **kwargs)
+    client.set_api_key("test_test")
+    return client
+
+
+def test_get_is_retried_on_unavailable(server, sleeps):
+    server.replies = [(503, UNAVAILABLE, {}), (502, UNAVAILABLE, {})]
+    payment = make_client(server).payments.get("tr_7UhSN1zuXS")
+
+    assert payment.id == "tr_7UhSN1zuXS"
+    assert len(server.requests) == 3
+    assert len(sleeps) == 2
+    assert 0.05 <= sleeps[0] <= 0.1 and 0.1 <= sleeps[1] <= 0.2, "Backoff should grow exponentially"
+
+
+def test_post_without_idempotency_key_is_not_retried_on_unavailable(server, sleeps):
+    server.replies = [(503, UNAVAILABLE, {})]
+    with pytest.raises(ResponseError, match="temporarily unavailable"):
+        make_client(server).payments.create({"amount": {"currency": "EUR", "value": "10.00"}})
+    assert len(server.requests) == 1
+
+
+def test_post_with_idempotency_key_is_retried(server, sleeps):
+    server.replies = [(503, UNAVAILABLE, {})]
+    make_client(server).payments.create({"amount": {"currency": "EUR", "value": "10.00"}}, idempotency_key="key-1")
+    assert server.requests == [("POST", "key-1"), ("POST", "key-1")]
+
+
+def test_too_many_requests_honors_retry_after(server, sleeps):
+    server.replies = [(429, TOO_MANY_REQUESTS, {"Retry-After": "2"})]
+    make_client(server).payments.create({"amount": {"currency": "EUR", "value": "10.00"}})
+
+    assert len(server.requests) == 2, "A rate limited request wasn't handled, so it should always be retried"
+    assert sleeps == [2.0]
+
+
+def test_retries_stop_at_the_deadline(server, sleeps):
+    server.replies = [(429, TOO_MANY_REQUESTS, {"Retry-After": "30"})]
+    client = make_client(server, retry=RetryPolicy(retries=3, deadline=10))
+    with pytest.raises(ResponseError, match="Slow down."):
+        client.payments.get("tr_7UhSN1zuXS")
+    assert len(server.requests) == 1
+    assert sleeps == []
+
+
+def test_read_timeout_is_retried_for_idempotent_requests(server, sleeps):
+    server.replies = [("timeout", 1, {})]
+    payment = make_client(server).payments.get("tr_7UhSN1zuXS")
+    assert payment.id == "tr_7UhSN1zuXS"
+    assert len(server.requests) == 2
+
+    server.replies = [("timeout", 1, {})]
+    with pytest.raises(RequestError, match="Read timed out"):
+        make_client(server).payments.create({"amount": {"currency": "EUR", "value": "10.00"}})
+    assert len(server.requests) == 3
+
+
+def test_connection_errors_are_always_retried(sleeps):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # nothing listens on the port now
+    with pytest.raises(RequestError, match="Unable to communicate with Mollie"):
+        make_client(port).payments.create({"amount": {"currency": "EUR", "value": "10.00"}})
+    assert len(sleeps) == 3
+
+
+def test_circuit_breaker_fails_fast(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+    client = make_client(server, retry=0, circuit_breaker=breaker)
+    server.replies = [(503, UNAVAILABLE, {}), (503, UNAVAILABLE, {})]
+
+    for _ in range(2):
+        with pytest.raises(ResponseError):
+            client.payments.get("tr_7UhSN1zuXS")
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.payments.get("tr_7UhSN1zuXS")
+    assert len(server.requests) == 2, "An open circuit shouldn't contact the API"
+
+    real_sleep(0.25)
+    assert client.payments.get("tr_7UhSN1zuXS").id == "tr_7UhSN1zuXS"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_reopens_after_failed_trial(mocker):
+    monotonic = mocker.patch("mollie.api.retry.time.monotonic", return_value=100)
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    monotonic.return_value = 130
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(), "Only a single trial request should be let through"
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_circuit_breaker_recovers_after_failed_retried_trial(server, sleeps, mocker):
+    monotonic = mocker.patch("mollie.api.retry.time.monotonic", return_value=100)
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    client = make_client(server, retry=RetryPolicy(retries=1, backoff_factor=0.1), circuit_breaker=breaker)
+    server.replies = [(503, UNAVAILABLE, {}), (503, UNAVAILABLE, {})]
+    with pytest.raises(ResponseError):
+        client.payments.get("tr_7UhSN1zuXS")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # the trial request is retried, its retry shouldn't be rejected by the half-open circuit
+    monotonic.return_value = 130
+    server.replies = [(503, UNAVAILABLE, {}), (503, UNAVAILABLE, {})]
+    with pytest.raises(ResponseError):
+        client.payments.get("tr_7UhSN1zuXS")
+    assert len(server.requests) == 4
+    assert breaker.state == CircuitBreaker.OPEN, "The failed trial should open the circuit again"
+    with pytest.raises(CircuitOpenError):
+        client.payments.get("tr_7UhSN1zuXS")
+
+    monotonic.return_value = 160
+    server.replies = [(503, UNAVAILABLE, {})]
+    assert client.payments.get("tr_7UhSN1zuXS").id == "tr_7UhSN1zuXS"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert client.payments.get("tr_7UhSN1zuXS").id == "tr_7UhSN1zuXS"
+
+
+def test_circuit_breaker_records_unexpected_errors_of_the_trial(server, sleeps, mocker):
+    monotonic = mocker.patch("mollie.api.retry.time.monotonic", return_value=100)
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    client = make_client(server, retry=0, circuit_breaker=breaker)
+    breaker.record_failure()
+
+    # e.g. the token refresh of an OAuth session failing
+    monotonic.return_value = 130
+    request = mocker.patch("requests.Session.request", side_effect=RuntimeError("Token refresh failed"))
+    with pytest.raises(RuntimeError):
+        client.payments.get("tr_7UhSN1zuXS")
+    assert breaker.state == CircuitBreaker.OPEN, "The failed trial should open the circuit again"
+
+    mocker.stop(request)
+    monotonic.return_value = 160
+    assert client.payments.get("tr_7UhSN1zuXS").id == "tr_7UhSN1zuXS"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_policy_decisions():
+    policy = RetryPolicy(retries=2, backoff_factor=1, deadline=None)
+    assert policy.get_delay(0, 0, "POST", {}, CONNECT_ERROR) is not None
+    assert policy.get_delay(0, 0, "POST", {}, READ_ERROR) is None
+    assert policy.get_delay(0, 0, "POST", {"Idempotency-Key": "key"}, READ_ERROR) is not None
+    assert policy.get_delay(0, 0, "GET", {}, 500) is None, "Internal server errors may not be transient"
+    assert policy.get_delay(0, 0, "GET", {}, 404) is None
+    assert policy.get_delay(2, 0, "GET", {}, 503) is None, "The maximum number of retries is reached"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert 9 <= parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert parse_retry_after(formatdate(time.time() - 10, usegmt=True)) == 0
+    assert parse_retry_after("soon") == 0
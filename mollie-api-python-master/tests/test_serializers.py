@@ -0,0 +1,69 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from mollie.api.client import Client
+from mollie.api.serializers import (
+    JSONSerializer,
+    OrjsonSerializer,
+    UjsonSerializer,
+    get_default_serializer,
+    orjson,
+    ujson,
+)
+
+RESPONSES_DIR = os.path.join(os.path.dirname(__file__), "responses")
+
+SERIALIZERS = [
+    JSONSerializer,
+    pytest.param(OrjsonSerializer, marks=pytest.mark.skipif(orjson is None, reason="orjson is not installed")),
+    pytest.param(UjsonSerializer, marks=pytest.mark.skipif(ujson is None, reason="ujson is not installed")),
+]
+
+
+def recorded_payloads():
+    for filename in sorted(os.listdir(RESPONSES_DIR)):
+        with open(os.path.join(RESPONSES_DIR, filename), "rb") as f:
+            content = f.read()
+        try:
+            expected = json.loads(content)
+        except ValueError:
+            continue  # deliberately broken responses
+        yield content, expected
+
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_serializer_decodes_recorded_responses(serializer):
+    payloads = list(recorded_payloads())
+    assert len(payloads) > 60
+    for content, expected in payloads:
+        assert serializer.loads(content) == expected
+        assert serializer.loads(serializer.dumps(expected)) == expected
+
+
+@pytest.mark.parametrize("serializer", SERIALIZERS)
+def test_serializer_refuses_datetimes(serializer):
+    with pytest.raises(Exception):
+        serializer.dumps({"createdAt": datetime.now()})
+
+
+def test_default_serializer():
+    expected = OrjsonSerializer if orjson else UjsonSerializer if ujson else JSONSerializer
+    assert isinstance(get_default_serializer(), expected)
+    assert isinstance(Client().serializer, expected)
+
+
+def test_client_uses_serializer(response, mocker):
+    serializer = JSONSerializer()
+    dumps = mocker.spy(serializer, "dumps")
+    loads = mocker.spy(serializer, "loads")
+    client = Client(serializer=serializer)
+    client.set_api_key("test_test")
+    response.post("https://api.mollie.com/v2/payments", "payment_single")
+
+    payment = client.payments.create({"amount": {"currency": "EUR", "value": "10.00"}})
+    assert payment.id == "tr_7UhSN1zuXS"
+    dumps.assert_called_once_with({"amount": {"currency": "EUR", "value": "10.00"}})
+    assert isinstance(loads.call_args[0][0], bytes), "Responses should be decoded from the raw bytes"
@@ -3,6 +3,7 @@ from django.db import models
 class Services(models.Model):
     title = models.CharField(max_length=200)
     image = models.ImageField(upload_to='images/')
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     body = models.TextField(default="Dit is fake bodytext, vervang mij in de admin")
     quotes= models.TextField(default="Dit is fake quotetext, vervang mij in de admin")
 
@@ -0,0 +1,5 @@
+from django.db.models.signals import post_save
+from cocktails.renditions import schedule_renditions
+from .models import Services
+
+post_save.connect(schedule_renditions, sender=Services, dispatch_uid='services_renditions')